@@ -387,7 +387,8 @@ class MainWindow(BaseWindow):
         def do_merge():
             vmfs = _vmfCache.get_vmfs()
             parent = get_parent(vmfs)
-            children = [vmf for vmf in vmfs if vmf is not parent]
+            children = list(vmfs)
+            children.remove(parent)
             
             return vmfmerge.do_merge(
                 parent, children,
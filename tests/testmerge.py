@@ -105,14 +105,12 @@ class TestMerge(unittest.TestCase):
             vmfdelta.RemoveObject(VMF.SOLID, 1),
         ]
         
-        expected = get_properties(
-            [
-                vmfdelta.RemoveObject(VMF.SOLID, 1),
-            ]
-        )
+        # Both sides of the conflict are held back from the merge.
+        expected = get_properties([])
         
         expectedConflicts = get_properties(
             [
+                vmfdelta.RemoveObject(VMF.SOLID, 1),
                 vmfdelta.ChangeObject(VMF.SOLID, 1),
             ]
         )
@@ -142,14 +140,12 @@ class TestMerge(unittest.TestCase):
             vmfdelta.RemoveObject(VMF.SOLID, 1),
         ]
         
-        expected = get_properties(
-            [
-                vmfdelta.RemoveObject(VMF.SOLID, 1),
-            ]
-        )
+        # Both sides of the conflict are held back from the merge.
+        expected = get_properties([])
         
         expectedConflicts = get_properties(
             [
+                vmfdelta.RemoveObject(VMF.SOLID, 1),
                 vmfdelta.ChangeObject(VMF.SOLID, 1),
                 vmfdelta.AddProperty(VMF.SOLID, 1, 'key', 'value1'),
                 vmfdelta.AddProperty(VMF.SOLID, 1, 'key', 'value2'),
@@ -166,6 +162,41 @@ class TestMerge(unittest.TestCase):
         self.assertEqual(expected, actual)
         self.assertEqual(expectedConflicts, conflicts)
         
+    def test_merge_list_property(self):
+        # Repeated keys give list values, which must merge like any other.
+        deltas1 = [
+            vmfdelta.ChangeProperty(VMF.ENTITY, 1, 'targetname', ['a', 'b']),
+        ]
+        
+        deltas2 = [
+            vmfdelta.ChangeProperty(VMF.ENTITY, 1, 'targetname', ['a', 'b']),
+        ]
+        
+        actual = vmfdelta.merge_delta_lists([deltas1, deltas2])
+        
+        self.assertEqual(deltas1, actual)
+        self.assertEqual(['a', 'b'], actual[0].value)
+        
+    def test_merge_list_property_conflict(self):
+        deltas1 = [
+            vmfdelta.ChangeProperty(VMF.ENTITY, 1, 'targetname', ['a', 'b']),
+        ]
+        
+        deltas2 = [
+            vmfdelta.ChangeProperty(VMF.ENTITY, 1, 'targetname', ['a', 'c']),
+        ]
+        
+        with self.assertRaises(vmfdelta.DeltaMergeConflict) as contextManager:
+            vmfdelta.merge_delta_lists([deltas1, deltas2])
+            
+        exception = contextManager.exception
+        
+        self.assertEqual([], exception.partialDeltas)
+        self.assertEqual(
+            [['a', 'b'], ['a', 'c']],
+            sorted(delta.value for delta in exception.conflictedDeltas),
+        )
+        
     def test_merge_outputs_1(self):
         deltas1 = [
             vmfdelta.AddOutput(42, 'OnPressed', 'value1', 0),
@@ -188,7 +219,14 @@ class TestMerge(unittest.TestCase):
         
         
 def get_properties(objects):
-    return set(tuple(object.__dict__.items()) for object in objects)
+    return set(tuple(iter_slot_items(object)) for object in objects)
+    
+    
+def iter_slot_items(object):
+    # Deltas use __slots__, so they don't have a __dict__ to inspect.
+    for cls in reversed(type(object).__mro__):
+        for name in getattr(cls, '__slots__', ()):
+            yield name, getattr(object, name)
     
     
 if __name__ == '__main__':
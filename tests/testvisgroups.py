@@ -19,16 +19,24 @@ class TestVisGroups(unittest.TestCase):
         
         expected = get_properties(
             [
-                vmfdelta.AddObject(None, VMF.VISGROUP, 1),
+                vmfdelta.AddObject(
+                    None, VMF.VISGROUP, 1,
+                    originVMF=childVmf,
+                ),
                 vmfdelta.AddProperty(
                     VMF.VISGROUP, 1,
                     'name', "Test 1",
+                    originVMF=childVmf,
                 ),
                 vmfdelta.AddProperty(
                     VMF.VISGROUP, 1,
                     'color', '100 117 234',
+                    originVMF=childVmf,
+                ),
+                vmfdelta.AddToVisGroup(
+                    VMF.SOLID, 2, 1,
+                    originVMF=childVmf,
                 ),
-                vmfdelta.AddToVisGroup(VMF.SOLID, 2, 1),
             ]
         )
         
@@ -56,7 +64,14 @@ class TestVisGroups(unittest.TestCase):
         
         
 def get_properties(objects):
-    return tuple(tuple(object.__dict__.items()) for object in objects)
+    return tuple(tuple(iter_slot_items(object)) for object in objects)
+    
+    
+def iter_slot_items(object):
+    # Deltas use __slots__, so they don't have a __dict__ to inspect.
+    for cls in reversed(type(object).__mro__):
+        for name in getattr(cls, '__slots__', ()):
+            yield name, getattr(object, name)
     
     
 if __name__ == '__main__':
@@ -8,8 +8,11 @@ and VMF objects.
 """
 
 import os
+import sys
 import copy
+import hashlib
 from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 
 from vdfutils import parse_vdf, format_vdf, VDFConsistencyError
 from vmfdelta import (
@@ -51,15 +54,30 @@ class VMF(object):
             
     EXTENSION = '.vmf'
     
-    WORLD = 'world'
-    SOLID = 'solid'
-    SIDE = 'side'
-    GROUP = 'group'
-    ENTITY = 'entity'
-    VISGROUP = 'visgroup'
+    # VMF object classes. These are explicitly interned so that comparing 
+    # and hashing the (vmfClass, id) tuples used throughout the merge 
+    # machinery can short-circuit on string identity. Every delta's vmfClass 
+    # should be one of these exact objects, rather than an equal string 
+    # that was built at runtime (e.g. read from a parsed VMF).
+    WORLD = sys.intern('world')
+    SOLID = sys.intern('solid')
+    SIDE = sys.intern('side')
+    GROUP = sys.intern('group')
+    ENTITY = sys.intern('entity')
+    VISGROUP = sys.intern('visgroup')
     
     CLASSES = (WORLD, SOLID, SIDE, GROUP, ENTITY, VISGROUP)
     
+    # Maps VMF classes (other than WORLD) to the names of the attributes that 
+    # hold their {id : object} dictionaries.
+    OBJECTS_BY_ID_ATTRS = {
+        SOLID       :   'solidsById',
+        SIDE        :   'sidesById',
+        GROUP       :   'groupsById',
+        ENTITY      :   'entitiesById',
+        VISGROUP    :   'visGroupsById',
+    }
+    
     # Used to delimit sub-property paths. We choose a sequence containing 
     # at least one double quote, because the double quote is the only human-
     # readable character that I know of that is universally disallowed in all 
@@ -81,23 +99,50 @@ class VMF(object):
         
         '''
         
+        return cls.from_data(VMF.read_path(path), path)
+        
+    @staticmethod
+    def read_path(path):
+        ''' Returns the unparsed contents of the given *.vmf file path.
+        
+        If the path doesn't have a *.vmf extension, raises InvalidVMF.
+        
+        '''
+        
         if not path.endswith(VMF.EXTENSION):
             raise InvalidVMF(path, "Invalid file extension!")
             
         with open(path, 'r') as f:
-            data = f.read()
+            return f.read()
             
+    @classmethod
+    def from_data(cls, data, path=None):
+        ''' Returns a constructed VMF from the given unparsed *.vmf file 
+        contents, which were read from the given path.
+        
+        If this cannot be done, raises InvalidVMF.
+        
+        '''
+        
         try:
             vmfData = parse_vdf(data, allowRepeats=True, escape=False)
         except VDFConsistencyError:
             raise InvalidVMF(path, "Failed to parse VMF!")
             
-        return cls(vmfData, path)
+        newVMF = cls(vmfData, path)
+        newVMF.contentDigest = hashlib.blake2b(data.encode()).digest()
+        
+        return newVMF
         
     def __init__(self, vmfData, path=None):
         self.vmfData = vmfData
         self.path = path
         
+        # A digest of the *.vmf file contents that this VMF was parsed from, 
+        # if any. This is cleared as soon as the VMF data is changed, so that 
+        # VMFs with equal digests are always known to be identical.
+        self.contentDigest = None
+        
         self.lastIdForVmfClass = {}
         
         self.revision = int(vmfData['versioninfo']['mapversion'])
@@ -241,7 +286,7 @@ class VMF(object):
                 worldId = get_id(value)
                 update_last_id(VMF.WORLD, worldId)
                 
-                add_solids_from_object(vmfClass, value)
+                add_solids_from_object(VMF.WORLD, value)
                 
                 # Add groups
                 if VMF.GROUP not in value:
@@ -262,7 +307,7 @@ class VMF(object):
                     
                     assert (VMF.GROUP, groupId) not in self.parentInfoForObject
                     self.parentInfoForObject[(VMF.GROUP, groupId)] = (
-                        vmfClass,
+                        VMF.WORLD,
                         worldId,
                     )
                     
@@ -285,7 +330,7 @@ class VMF(object):
                     
                     update_last_id(VMF.ENTITY, id)
                     
-                    add_solids_from_object(vmfClass, entity)
+                    add_solids_from_object(VMF.ENTITY, entity)
                     
         if self.world is None:
             raise InvalidVMF(self.path, "VMF has no world entry!")
@@ -314,10 +359,17 @@ class VMF(object):
                     
                 update_last_id(VMF.VISGROUP, id)
                 
+    def to_data(self):
+        ''' Returns the unparsed *.vmf file contents for this VMF. '''
+        
+        return format_vdf(self.vmfData, escape=False)
+        
     def write_path(self, path):        
         ''' Saves this VMF to the given path. '''
         
-        outData = format_vdf(self.vmfData, escape=False)
+        # Format the VMF before opening the file, so that a formatting error 
+        # doesn't leave an empty or truncated file behind.
+        outData = self.to_data()
         
         with open(path, 'w') as f:
             f.write(outData)
@@ -325,6 +377,40 @@ class VMF(object):
     def get_filename(self):
         return os.path.basename(self.path)
         
+    def has_same_contents(self, other):
+        ''' Returns True if this VMF and the given VMF are known to be 
+        identical, because they were parsed from exactly the same file 
+        contents and neither has been changed since.
+        
+        '''
+        
+        return (
+            self.contentDigest is not None
+            and self.contentDigest == other.contentDigest
+        )
+        
+    def discard_geometry(self):
+        ''' Drops all of this VMF's object data, so that it can still serve as 
+        the origin of deltas without holding its whole object tree in memory.
+        
+        Only the path, revision, ID counters and parent information are kept, 
+        since merging still looks up the parents of objects in the origin VMF. 
+        The VMF can no longer be compared, applied to, or written after this.
+        
+        '''
+        
+        self.vmfData = None
+        self.contentDigest = None
+        
+        self.world = None
+        self.solidsById = None
+        self.sidesById = None
+        self.groupsById = None
+        self.entitiesById = None
+        self.visGroupsById = None
+        
+        self.entityIdForSolidId = None
+        
     def get_solid(self, id):
         try:
             return self.solidsById[id]
@@ -356,24 +442,21 @@ class VMF(object):
             raise VMF.ObjectDoesNotExist(VMF.VISGROUP, id)
             
     def get_object(self, vmfClass, id):
-        return {
-            VMF.WORLD       :   lambda id: self.world,
-            VMF.SOLID       :   self.get_solid,
-            VMF.SIDE        :   self.get_side,
-            VMF.GROUP       :   self.get_group,
-            VMF.ENTITY      :   self.get_entity,
-            VMF.VISGROUP    :   self.get_visgroup,
-        }[vmfClass](id)
+        if vmfClass == VMF.WORLD:
+            return self.world
+            
+        objectsById = getattr(self, VMF.OBJECTS_BY_ID_ATTRS[vmfClass])
         
+        try:
+            return objectsById[id]
+        except KeyError:
+            raise VMF.ObjectDoesNotExist(vmfClass, id)
+            
     def has_object(self, vmfClass, id):
-        return id in {
-            VMF.WORLD       :   {get_id(self.world) : self.world},
-            VMF.SOLID       :   self.solidsById,
-            VMF.SIDE        :   self.sidesById,
-            VMF.GROUP       :   self.groupsById,
-            VMF.ENTITY      :   self.entitiesById,
-            VMF.VISGROUP    :   self.visGroupsById,
-        }[vmfClass]
+        if vmfClass == VMF.WORLD:
+            return id == get_id(self.world)
+            
+        return id in getattr(self, VMF.OBJECTS_BY_ID_ATTRS[vmfClass])
         
     def iter_solids(self):
         return self.solidsById.values()
@@ -558,6 +641,9 @@ class VMF(object):
         
         '''
         
+        # The VMF data is about to change.
+        self.contentDigest = None
+        
         # Keep track of all objects that have been removed. This way, we can 
         # know when removing a sub-object is redundant (since its parent would 
         # have already been removed).
@@ -813,6 +899,10 @@ class VMF(object):
                 # This side was reparented. Fix up its ID to be unique instead.
                 sidesToFix.append(side)
                 
+        if sidesToFix:
+            # The VMF data is about to change.
+            self.contentDigest = None
+            
         for side in sidesToFix:
             oldId = get_id(side)
             
@@ -1066,11 +1156,18 @@ def compare_vmfs(parent, child):
     """ Compares the given two VMFs, and returns a list of VMFDeltas 
     representing the changes required to mutate the parent into the child.
     
+    The returned deltas all have the child as their origin VMF.
+    
     """
     
     assert isinstance(parent, VMF)
     assert isinstance(child, VMF)
     
+    # If the child was parsed from exactly the same file contents as the 
+    # parent, there are no changes to find.
+    if child.has_same_contents(parent):
+        return []
+        
     # NOTE: The use of VMF.fixup_side_ids() makes compare_vmfs() an impure
     # function with side-effects on the child VMF object.
     # YOU HAVE BEEN WARNED!!!!!
@@ -1118,13 +1215,16 @@ def compare_vmfs(parent, child):
             if visGroupInfo in newIdForNewChildObject:
                 visGroupId = newIdForNewChildObject[visGroupInfo]
                 
-            newDelta = AddToVisGroup(vmfClass, id, visGroupId)
+            newDelta = AddToVisGroup(vmfClass, id, visGroupId, originVMF=child)
             deltas.append(newDelta)
             
         # Check for deleted VisGroups
         for visGroupId in deletedVisGroupIds:
             visGroupInfo = (VMF.VISGROUP, visGroupId)
-            newDelta = RemoveFromVisGroup(vmfClass, id, visGroupId)
+            newDelta = RemoveFromVisGroup(
+                vmfClass, id, visGroupId,
+                originVMF=child,
+            )
             deltas.append(newDelta)
             
     # Set to keep track of all the ChangeObject deltas we've added.
@@ -1146,7 +1246,7 @@ def compare_vmfs(parent, child):
         while True:
             vmfClass, id = objectInfo
             
-            newDelta = ChangeObject(vmfClass, id)
+            newDelta = ChangeObject(vmfClass, id, originVMF=child)
             
             if newDelta in changeObjectDeltaSet:
                 break
@@ -1218,7 +1318,10 @@ def compare_vmfs(parent, child):
             if newObjectParentInfo is not None:
                 add_change_object_deltas(*newObjectParentInfo)
                 
-            newDelta = AddObject(newObjectParentInfo, vmfClass, newId)
+            newDelta = AddObject(
+                newObjectParentInfo, vmfClass, newId,
+                originVMF=child,
+            )
             deltas.append(newDelta)
             
             # Add each of the object's properties.
@@ -1250,7 +1353,10 @@ def compare_vmfs(parent, child):
                         )
                         
                     # Add the property as an AddProperty delta.
-                    newDelta = AddProperty(vmfClass, newId, key, value)
+                    newDelta = AddProperty(
+                        vmfClass, newId, key, value,
+                        originVMF=child,
+                    )
                     deltas.append(newDelta)
                     
                     # If this is an entity that has a 'sides' property, we'll 
@@ -1265,7 +1371,10 @@ def compare_vmfs(parent, child):
             # object is an entity.
             if vmfClass == VMF.ENTITY:
                 for output, value, outputId in iter_outputs(childObject):
-                    newDelta = AddOutput(newId, output, value, outputId)
+                    newDelta = AddOutput(
+                        newId, output, value, outputId,
+                        originVMF=child,
+                    )
                     deltas.append(newDelta)
                     
     # Check for changed/deleted objects.
@@ -1285,9 +1394,12 @@ def compare_vmfs(parent, child):
             ]
             
             if childInfos:
-                newDelta = RemoveObject(vmfClass, id, childInfos)
+                newDelta = RemoveObject(
+                    vmfClass, id, childInfos,
+                    originVMF=child,
+                )
             else:
-                newDelta = RemoveObject(vmfClass, id)
+                newDelta = RemoveObject(vmfClass, id, originVMF=child)
                 
             deltas.append(newDelta)
             continue    # Doing this saves an extra indentation level.
@@ -1318,7 +1430,10 @@ def compare_vmfs(parent, child):
                     
                 assert vmfClass != VMF.SIDE
                 
-                newDelta = ReparentObject(newParentInfo, vmfClass, id)
+                newDelta = ReparentObject(
+                    newParentInfo, vmfClass, id,
+                    originVMF=child,
+                )
                 deltas.append(newDelta)
                 
         # Figure out VisGroup deltas.
@@ -1352,6 +1467,7 @@ def compare_vmfs(parent, child):
                     id,
                     key,
                     copy.deepcopy(value),
+                    originVMF=child,
                 )
                 deltas.append(newDelta)
                 
@@ -1373,7 +1489,7 @@ def compare_vmfs(parent, child):
             except KeyError:
                 # Property was deleted.
                 add_change_object_deltas(vmfClass, id)
-                newDelta = RemoveProperty(vmfClass, id, key)
+                newDelta = RemoveProperty(vmfClass, id, key, originVMF=child)
                 deltas.append(newDelta)
                 continue
                 
@@ -1394,6 +1510,7 @@ def compare_vmfs(parent, child):
                     id,
                     key,
                     copy.deepcopy(childPropertyValue),
+                    originVMF=child,
                 )
                 deltas.append(newDelta)
                 
@@ -1417,7 +1534,10 @@ def compare_vmfs(parent, child):
                 add_change_object_deltas(vmfClass, id)
                 
                 output, value, outputId = outputInfo
-                newDelta = AddOutput(id, output, value, outputId)
+                newDelta = AddOutput(
+                    id, output, value, outputId,
+                    originVMF=child,
+                )
                 deltas.append(newDelta)
                 
             # Check for deleted entity outputs.
@@ -1425,7 +1545,10 @@ def compare_vmfs(parent, child):
                 add_change_object_deltas(vmfClass, id)
                 
                 output, value, outputId = outputInfo
-                newDelta = RemoveOutput(id, output, value, outputId)
+                newDelta = RemoveOutput(
+                    id, output, value, outputId,
+                    originVMF=child,
+                )
                 deltas.append(newDelta)
                 
     # Check for newly-tied solids.
@@ -1448,7 +1571,7 @@ def compare_vmfs(parent, child):
             add_change_object_deltas(VMF.SOLID, solidId)
             add_change_object_deltas(VMF.ENTITY, newEntityId)
             
-            newDelta = TieSolid(solidId, newEntityId)
+            newDelta = TieSolid(solidId, newEntityId, originVMF=child)
             deltas.append(newDelta)
             
         else:
@@ -1465,14 +1588,19 @@ def compare_vmfs(parent, child):
                 add_change_object_deltas(VMF.SOLID, solidId)
                 add_change_object_deltas(VMF.ENTITY, newId)
                 
-                deltas.append(UntieSolid(solidId, parentEntityId))
-                deltas.append(TieSolid(solidId, newId))
+                deltas.append(
+                    UntieSolid(
+                        solidId, parentEntityId,
+                        originVMF=child,
+                    )
+                )
+                deltas.append(TieSolid(solidId, newId, originVMF=child))
                 
     # Check for untied solids.
     for solidId, entityId in parent.entityIdForSolidId.items():
         if (solidId not in child.entityIdForSolidId
                 and child.has_object(VMF.SOLID, solidId)):
-            newDelta = UntieSolid(solidId, entityId)
+            newDelta = UntieSolid(solidId, entityId, originVMF=child)
             deltas.append(newDelta)
             
     # Fix up cubemap and overlay deltas, which probably point to the wrong 
@@ -1528,21 +1656,37 @@ def load_vmfs(vmfPaths, output=True):
     
     If 'output' is True, writes progress to stdout.
     
+    Each file is read on a background thread while the VMF before it is being 
+    parsed. Only one file is read ahead at a time, so no more than two files' 
+    worth of unparsed contents are ever held in memory at once.
+    
     """
     
+    if not vmfPaths:
+        return []
+        
     vmfs = []
-    for i, path in enumerate(vmfPaths):
-        if output:
-            print("\t* ({}/{}) Loading {}..."
-                .format(
-                    i + 1,
-                    len(vmfPaths),
-                    path,
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        nextData = executor.submit(VMF.read_path, vmfPaths[0])
+        
+        for i, path in enumerate(vmfPaths):
+            if output:
+                print("\t* ({}/{}) Loading {}..."
+                    .format(
+                        i + 1,
+                        len(vmfPaths),
+                        path,
+                    )
                 )
-            )
+                
+            data = nextData.result()
+            
+            # Start reading the next file while this one is being parsed.
+            if i + 1 < len(vmfPaths):
+                nextData = executor.submit(VMF.read_path, vmfPaths[i + 1])
+                
+            vmfs.append(VMF.from_data(data, path))
             
-        vmfs.append(VMF.from_path(path))
-        
     return vmfs
     
     
\ No newline at end of file
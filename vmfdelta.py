@@ -5,8 +5,7 @@ vmfdelta.py
 """
 
 import os
-import copy
-from collections import OrderedDict
+from itertools import chain
 
 import vmf
 
@@ -32,23 +31,73 @@ class VMFDelta(object):
     
     __slots__ = (
         'originVMF',
-        '_type',
+        '_equiv',
+        '_hash',
     )
     
+    # The name of this delta's type. This only depends on the class, so each 
+    # subclass sets it as a class attribute rather than storing it on every 
+    # instance.
+    _type = 'VMFDelta'
+    
     def __init__(self, originVMF=None):
         # The file from which this delta originated.
         self.originVMF = originVMF
-        self._type = self.__class__.__name__
+        
+        # Subclasses set their own attributes before calling this, so the 
+        # equivalence attributes (and their hash) can be computed once here 
+        # and reused by every __eq__() and __hash__() call.
+        self._equiv = self._equiv_attrs()
+        self._hash = hash(self._equiv)
         
     def __copy__(self):
         return VMFDelta(self.originVMF)
         
+    def clone(self, **changes):
+        ''' Returns a shallow copy of this delta, with the given attributes 
+        (if any) replaced by new values.
+        
+        This calls the delta's __copy__() directly, which saves a trip 
+        through the copy module's dispatch machinery.
+        
+        Deltas should not be mutated after construction, since their 
+        equivalence attributes are computed up front; use this instead.
+        
+        '''
+        
+        clone = self.__copy__()
+        
+        if changes:
+            for name, value in changes.items():
+                setattr(clone, name, value)
+                
+            clone._equiv = clone._equiv_attrs()
+            clone._hash = hash(clone._equiv)
+            
+        return clone
+        
+    def remap_ids(self, cloneIdForObjectInfo):
+        ''' Returns a copy of this delta that targets the cloned objects given 
+        by `cloneIdForObjectInfo`, a dict mapping (vmfClass, id) object infos 
+        to the IDs of their clones.
+        
+        By default, this points the delta's own (vmfClass, id) object at its 
+        clone. Deltas that identify their objects differently override this.
+        
+        '''
+        
+        return self.clone(id=cloneIdForObjectInfo[(self.vmfClass, self.id)])
+        
     def _equiv_attrs(self):
         ''' Gives a tuple of attributes that matter for the purposes of 
         "equivalence" between deltas of this type.
         
         (See .__eq__() for an explanation of what this means.)
         
+        This is only called when a delta is constructed (or cloned with 
+        changes); the result is stored in the delta's `_equiv` attribute, and 
+        its hash in `_hash`.
+        
         '''
         
         raise NotImplementedError
@@ -66,7 +115,7 @@ class VMFDelta(object):
         
         return (
             type(self) is type(other)
-            and self._equiv_attrs() == other._equiv_attrs()
+            and self._equiv == other._equiv
         )
         
     def __hash__(self):
@@ -75,7 +124,7 @@ class VMFDelta(object):
         
         '''
         
-        return hash(self._equiv_attrs())
+        return self._hash
         
     def get_origin_filename(self):
         if self.originVMF is None:
@@ -91,6 +140,8 @@ class AddObject(VMFDelta):
         'id',
     )
     
+    _type = 'AddObject'
+    
     def __init__(self, parent, vmfClass, id, originVMF=None):
         self.parent = parent
         self.vmfClass = vmfClass
@@ -101,10 +152,13 @@ class AddObject(VMFDelta):
         return AddObject(self.parent, self.vmfClass, self.id, self.originVMF)
         
     def __repr__(self):
-        return "AddObject({}, {}, {})".format(
-            repr(self.parent),
-            repr(self.vmfClass),
-            repr(self.id),
+        return f"AddObject({self.parent!r}, {self.vmfClass!r}, {self.id!r})"
+        
+    def remap_ids(self, cloneIdForObjectInfo):
+        # New objects are never cloned themselves, but the parent might be.
+        parentClass, _ = self.parent
+        return self.clone(
+            parent=(parentClass, cloneIdForObjectInfo[self.parent]),
         )
         
     def _equiv_attrs(self):
@@ -118,6 +172,8 @@ class RemoveObject(VMFDelta):
         'cascadedRemovals',
     )
     
+    _type = 'RemoveObject'
+    
     def __init__(self, vmfClass, id, cascadedRemovals=None, originVMF=None):
         self.vmfClass = vmfClass
         self.id = id
@@ -142,17 +198,28 @@ class RemoveObject(VMFDelta):
         
     def __repr__(self):
         if self.cascadedRemovals is not None:
-            return "RemoveObject({}, {}, {})".format(
-                repr(self.vmfClass),
-                repr(self.id),
-                repr(self.cascadedRemovals),
+            return (
+                f"RemoveObject({self.vmfClass!r}, {self.id!r}, "
+                f"{self.cascadedRemovals!r})"
             )
         else:
-            return "RemoveObject({}, {})".format(
-                repr(self.vmfClass),
-                repr(self.id),
-            )
+            return f"RemoveObject({self.vmfClass!r}, {self.id!r})"
+            
+    def remap_ids(self, cloneIdForObjectInfo):
+        # Fix up the cascaded removals as well.
+        # Probably not really necessary, but we may as well do it.
+        cascadedRemovals = self.cascadedRemovals
+        if cascadedRemovals is not None:
+            cascadedRemovals = [
+                (subClass, cloneIdForObjectInfo[(subClass, subId)])
+                for subClass, subId in cascadedRemovals
+            ]
             
+        return self.clone(
+            id=cloneIdForObjectInfo[(self.vmfClass, self.id)],
+            cascadedRemovals=cascadedRemovals,
+        )
+        
     def _equiv_attrs(self):
         return (self.vmfClass, self.id)
         
@@ -163,6 +230,8 @@ class ChangeObject(VMFDelta):
         'id',
     )
     
+    _type = 'ChangeObject'
+    
     def __init__(self, vmfClass, id, originVMF=None):
         self.vmfClass = vmfClass
         self.id = id
@@ -172,10 +241,7 @@ class ChangeObject(VMFDelta):
         return ChangeObject(self.vmfClass, self.id, self.originVMF)
         
     def __repr__(self):
-        return "ChangeObject({}, {})".format(
-            repr(self.vmfClass),
-            repr(self.id),
-        )
+        return f"ChangeObject({self.vmfClass!r}, {self.id!r})"
         
     def _equiv_attrs(self):
         return (self.vmfClass, self.id)
@@ -189,6 +255,8 @@ class AddProperty(VMFDelta):
         'value',
     )
     
+    _type = 'AddProperty'
+    
     def __init__(self, vmfClass, id, key, value, originVMF=None):
         self.vmfClass = vmfClass
         self.id = id
@@ -204,11 +272,9 @@ class AddProperty(VMFDelta):
         )
         
     def __repr__(self):
-        return "AddProperty({}, {}, {}, {})".format(
-            repr(self.vmfClass),
-            repr(self.id),
-            repr(self.key),
-            repr(self.value),
+        return (
+            f"AddProperty({self.vmfClass!r}, {self.id!r}, {self.key!r}, "
+            f"{self.value!r})"
         )
         
     def _equiv_attrs(self):
@@ -222,6 +288,8 @@ class RemoveProperty(VMFDelta):
         'key',
     )
     
+    _type = 'RemoveProperty'
+    
     def __init__(self, vmfClass, id, key, originVMF=None):
         self.vmfClass = vmfClass
         self.id = id
@@ -235,11 +303,7 @@ class RemoveProperty(VMFDelta):
         )
         
     def __repr__(self):
-        return "RemoveProperty({}, {}, {})".format(
-            repr(self.vmfClass),
-            repr(self.id),
-            repr(self.key),
-        )
+        return f"RemoveProperty({self.vmfClass!r}, {self.id!r}, {self.key!r})"
         
     def _equiv_attrs(self):
         return (self.vmfClass, self.id, self.key)
@@ -253,6 +317,8 @@ class ChangeProperty(VMFDelta):
         'value',
     )
     
+    _type = 'ChangeProperty'
+    
     def __init__(self, vmfClass, id, key, value, originVMF=None):
         self.vmfClass = vmfClass
         self.id = id
@@ -268,11 +334,9 @@ class ChangeProperty(VMFDelta):
         )
         
     def __repr__(self):
-        return "ChangeProperty({}, {}, {}, {})".format(
-            repr(self.vmfClass),
-            repr(self.id),
-            repr(self.key),
-            repr(self.value),
+        return (
+            f"ChangeProperty({self.vmfClass!r}, {self.id!r}, {self.key!r}, "
+            f"{self.value!r})"
         )
         
     def _equiv_attrs(self):
@@ -285,6 +349,8 @@ class TieSolid(VMFDelta):
         'entityId',
     )
     
+    _type = 'TieSolid'
+    
     def __init__(self, solidId, entityId, originVMF=None):
         self.solidId = solidId
         self.entityId = entityId
@@ -294,9 +360,18 @@ class TieSolid(VMFDelta):
         return TieSolid(self.solidId, self.entityId, self.originVMF)
         
     def __repr__(self):
-        return "TieSolid({}, {})".format(
-            repr(self.solidId),
-            repr(self.entityId),
+        return f"TieSolid({self.solidId!r}, {self.entityId!r})"
+        
+    def remap_ids(self, cloneIdForObjectInfo):
+        VMF = vmf.VMF
+        
+        # The Solid should ALWAYS have a clone, but the Entity won't if the 
+        # Entity itself is new.
+        return self.clone(
+            solidId=cloneIdForObjectInfo[(VMF.SOLID, self.solidId)],
+            entityId=cloneIdForObjectInfo.get(
+                (VMF.ENTITY, self.entityId), self.entityId
+            ),
         )
         
     def _equiv_attrs(self):
@@ -309,6 +384,8 @@ class UntieSolid(VMFDelta):
         'entityId',
     )
     
+    _type = 'UntieSolid'
+    
     def __init__(self, solidId, entityId, originVMF=None):
         self.solidId = solidId
         
@@ -322,9 +399,18 @@ class UntieSolid(VMFDelta):
         return UntieSolid(self.solidId, self.entityId, self.originVMF)
         
     def __repr__(self):
-        return "UntieSolid({}, {})".format(
-            repr(self.solidId),
-            repr(self.entityId),
+        return f"UntieSolid({self.solidId!r}, {self.entityId!r})"
+        
+    def remap_ids(self, cloneIdForObjectInfo):
+        VMF = vmf.VMF
+        
+        # The Solid should ALWAYS have a clone, but the Entity won't if the 
+        # Entity itself is new.
+        return self.clone(
+            solidId=cloneIdForObjectInfo[(VMF.SOLID, self.solidId)],
+            entityId=cloneIdForObjectInfo.get(
+                (VMF.ENTITY, self.entityId), self.entityId
+            ),
         )
         
     def _equiv_attrs(self):
@@ -339,6 +425,8 @@ class AddOutput(VMFDelta):
         'outputId',
     )
     
+    _type = 'AddOutput'
+    
     def __init__(self, entityId, output, value, outputId, originVMF=None):
         self.entityId = entityId
         self.output = output
@@ -354,11 +442,14 @@ class AddOutput(VMFDelta):
         )
         
     def __repr__(self):
-        return "AddOutput({}, {}, {}, {})".format(
-            repr(self.entityId),
-            repr(self.output),
-            repr(self.value),
-            repr(self.outputId),
+        return (
+            f"AddOutput({self.entityId!r}, {self.output!r}, {self.value!r}, "
+            f"{self.outputId!r})"
+        )
+        
+    def remap_ids(self, cloneIdForObjectInfo):
+        return self.clone(
+            entityId=cloneIdForObjectInfo[(vmf.VMF.ENTITY, self.entityId)],
         )
         
     def _equiv_attrs(self):
@@ -373,6 +464,8 @@ class RemoveOutput(VMFDelta):
         'outputId',
     )
     
+    _type = 'RemoveOutput'
+    
     def __init__(self, entityId, output, value, outputId, originVMF=None):
         self.entityId = entityId
         self.output = output
@@ -388,11 +481,14 @@ class RemoveOutput(VMFDelta):
         )
         
     def __repr__(self):
-        return "RemoveOutput({}, {}, {}, {})".format(
-            repr(self.entityId),
-            repr(self.output),
-            repr(self.value),
-            repr(self.outputId),
+        return (
+            f"RemoveOutput({self.entityId!r}, {self.output!r}, "
+            f"{self.value!r}, {self.outputId!r})"
+        )
+        
+    def remap_ids(self, cloneIdForObjectInfo):
+        return self.clone(
+            entityId=cloneIdForObjectInfo[(vmf.VMF.ENTITY, self.entityId)],
         )
         
     def _equiv_attrs(self):
@@ -406,6 +502,8 @@ class ReparentObject(VMFDelta):
         'id',
     )
     
+    _type = 'ReparentObject'
+    
     def __init__(self, parent, vmfClass, id, originVMF=None):
         self.parent = parent
         self.vmfClass = vmfClass
@@ -420,10 +518,8 @@ class ReparentObject(VMFDelta):
         )
         
     def __repr__(self):
-        return "ReparentObject({}, {}, {})".format(
-            repr(self.parent),
-            repr(self.vmfClass),
-            repr(self.id),
+        return (
+            f"ReparentObject({self.parent!r}, {self.vmfClass!r}, {self.id!r})"
         )
         
     def _equiv_attrs(self):
@@ -436,6 +532,8 @@ class ReparentObject(VMFDelta):
         # 'parentId',
     # )
     
+    # _type = 'MoveVisGroup'
+    
     # def __init__(self, visGroupId, parentId, originVMF=None):
         # self.visGroupId = visGroupId
         # self.parentId = parentId
@@ -461,6 +559,8 @@ class AddToVisGroup(VMFDelta):
         'visGroupId',
     )
     
+    _type = 'AddToVisGroup'
+    
     def __init__(self, vmfClass, id, visGroupId, originVMF=None):
         # This wouldn't make any sense.
         assert vmfClass != vmf.VMF.SIDE
@@ -478,10 +578,9 @@ class AddToVisGroup(VMFDelta):
         )
         
     def __repr__(self):
-        return "AddToVisGroup({}, {}, {})".format(
-            repr(self.vmfClass),
-            repr(self.id),
-            repr(self.visGroupId),
+        return (
+            f"AddToVisGroup({self.vmfClass!r}, {self.id!r}, "
+            f"{self.visGroupId!r})"
         )
         
     def _equiv_attrs(self):
@@ -495,6 +594,8 @@ class RemoveFromVisGroup(VMFDelta):
         'visGroupId',
     )
     
+    _type = 'RemoveFromVisGroup'
+    
     def __init__(self, vmfClass, id, visGroupId, originVMF=None):
         self.vmfClass = vmfClass
         self.id = id
@@ -509,10 +610,9 @@ class RemoveFromVisGroup(VMFDelta):
         )
         
     def __repr__(self):
-        return "RemoveFromVisGroup({}, {}, {})".format(
-            repr(self.vmfClass),
-            repr(self.id),
-            repr(self.visGroupId),
+        return (
+            f"RemoveFromVisGroup({self.vmfClass!r}, {self.id!r}, "
+            f"{self.visGroupId!r})"
         )
         
     def _equiv_attrs(self):
@@ -525,6 +625,8 @@ class HideObject(VMFDelta):
         'id',
     )
     
+    _type = 'HideObject'
+    
     def __init__(self, vmfClass, id, originVMF=None):
         self.vmfClass = vmfClass
         self.id = id
@@ -534,10 +636,7 @@ class HideObject(VMFDelta):
         return HideObject(self.vmfClass, self.id, self.originVMF)
         
     def __repr__(self):
-        return "HideObject({}, {})".format(
-            repr(self.vmfClass),
-            repr(self.id),
-        )
+        return f"HideObject({self.vmfClass!r}, {self.id!r})"
         
     def _equiv_attrs(self):
         return (self.vmfClass, self.id)
@@ -549,6 +648,8 @@ class UnHideObject(VMFDelta):
         'id',
     )
     
+    _type = 'UnHideObject'
+    
     def __init__(self, vmfClass, id, originVMF=None):
         self.vmfClass = vmfClass
         self.id = id
@@ -558,144 +659,372 @@ class UnHideObject(VMFDelta):
         return UnHideObject(self.vmfClass, self.id, self.originVMF)
         
     def __repr__(self):
-        return "UnHideObject({}, {})".format(
-            repr(self.vmfClass),
-            repr(self.id),
-        )
+        return f"UnHideObject({self.vmfClass!r}, {self.id!r})"
         
     def _equiv_attrs(self):
         return (self.vmfClass, self.id)
         
         
-def merge_delta_lists(deltaLists, aggressive=False, verbose=False):
-    """ Takes multiple lists of deltas, and merges them into a single list of
-    deltas that can be used to mutate the parent VMF into a merged VMF with 
-    all the required changes.
+def _get_indexed_value(value):
+    """ Returns the form in which the given property value is stored in a 
+    _DeltaMerger's value index.
     
-    If a conflict is detected, raises DeltaMergeConflict, with the exception's 
-    'partialDeltas' attribute set to the partial list of merged deltas with 
-    the conflicts removed.
+    Properties with repeated keys have lists of values, which can't go into a 
+    set as they are, so they are indexed as tuples instead. Any other value 
+    that still can't be hashed is indexed by its repr(). Two values compare 
+    equal exactly when their indexed forms do.
     
     """
     
-    # Because otherwise we get circular imports if we use 
-    # `from vmf import VMF`. Ugh.
-    VMF = vmf.VMF
+    if isinstance(value, str):
+        return value
+        
+    if isinstance(value, list):
+        value = tuple(value)
+        
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+        
+    return value
     
-    # The delta types we care about, in the order that we care about.
-    deltaTypes = (
-        AddObject,
-        UntieSolid,
-        ReparentObject,
-        RemoveObject,
-        TieSolid,
-        ChangeObject,
-        AddProperty,
-        RemoveProperty,
-        ChangeProperty,
-        AddOutput,
-        RemoveOutput,
-        AddToVisGroup,
-        RemoveFromVisGroup,
-        # HideObject,
-        # UnHideObject,
-    )
     
-    # For keeping track of which deltas have been merged so far.
-    # Maps deltas to themselves, so that they can be retrieved for comparison.
-    mergedDeltasDict = OrderedDict()
+class _DeltaMerger(object):
+    """ Holds the state of a single merge_delta_lists() call, and merges 
+    deltas into that state one at a time.
+    
+    Merged and conflicted deltas are indexed by their "delta keys": tuples of 
+    the form (DeltaType, equivalence attributes), such as 
+    (RemoveObject, (vmfClass, id)). Two deltas have the same key exactly when 
+    they are "equal" (see VMFDelta.__eq__()), so the merge can look for 
+    related deltas by building a tuple rather than a throwaway probe delta.
+    
+    """
     
-    # For keeping track of which deltas are conflicted.
-    # Maps deltas to a list of all deltas that are "equal" to that delta, so 
-    # we can retrieve all deltas that conflict.
-    conflictedDeltasDict = OrderedDict()
+    __slots__ = (
+        'verbose',
+        'mergedDeltaForKey',
+        'firstMergedDeltaForKey',
+        'conflictedDeltasForKey',
+        'addSidesDeltasForSolidId',
+        'parentInfoCache',
+        'valuesForKey',
+    )
     
-    # For keeping track of deltas that add new Sides to an existing Solid.
-    # Maps parent VMF Solid IDs to a list of AddObject deltas that have added
-    # new Sides to that Solid.
-    addSidesDeltasForSolidId = {}
+    # Maps delta types to the name of the method that merges deltas of that 
+    # type. Delta types that aren't listed here have no type-specific checks, 
+    # and are merged by add_merged_delta().
+    MERGE_METHODS = {
+        AddObject       :   'merge_add_object',
+        ChangeObject    :   'merge_change_object',
+        AddProperty     :   'merge_add_property',
+        ChangeProperty  :   'merge_change_property',
+        TieSolid        :   'merge_tie_solid',
+        ReparentObject  :   'merge_reparent_object',
+        AddToVisGroup   :   'merge_add_to_visgroup',
+    }
     
-    def iter_processed_deltas(delta):
+    def __init__(self, verbose=False):
+        self.verbose = verbose
+        
+        # For keeping track of which deltas have been merged so far.
+        # Maps delta keys to the most recently merged delta with that key, so 
+        # that it can be retrieved for comparison.
+        self.mergedDeltaForKey = {}
+        
+        # When more than one equivalent delta is merged, the first one is the 
+        # one that ends up in the merge result.
+        # Maps delta keys to the first merged delta with that key, but only 
+        # for keys that have been merged more than once.
+        self.firstMergedDeltaForKey = {}
+        
+        # For keeping track of which deltas are conflicted.
+        # Maps delta keys to a list of all conflicted deltas with that key, so 
+        # we can retrieve all deltas that conflict.
+        self.conflictedDeltasForKey = {}
+        
+        # For keeping track of deltas that add new Sides to an existing Solid.
+        # Maps parent VMF Solid IDs to a list of AddObject deltas that have 
+        # added new Sides to that Solid.
+        self.addSidesDeltasForSolidId = {}
+        
+        # Caches parent info lookups on the origin VMFs for the duration of 
+        # this merge, since sibling deltas tend to ask about the same objects.
+        # Maps (originVMF, vmfClass, id) to the result of 
+        # get_object_parent_info().
+        self.parentInfoCache = {}
+        
+        # For keeping track of the values that merged and conflicted 
+        # AddProperty/ChangeProperty deltas have set each property to.
+        # Maps property delta keys to the set of all values seen for deltas 
+        # with that key, as returned by _get_indexed_value().
+        self.valuesForKey = {}
+        
+    def get_merged_deltas(self):
+        ''' Returns a list of all currently merged deltas, in merge order. '''
+        
+        firstMergedDeltaForKey = self.firstMergedDeltaForKey
+        
+        if not firstMergedDeltaForKey:
+            return list(self.mergedDeltaForKey.values())
+            
+        return [
+            firstMergedDeltaForKey.get(deltaKey, delta)
+            for deltaKey, delta in self.mergedDeltaForKey.items()
+        ]
+        
+    def get_origin_parent_info(self, delta):
+        ''' Returns the parent info of the object affected by the given delta,
+        as it exists in the delta's origin VMF.
+        
+        '''
+        
+        if delta.originVMF is None:
+            return None
+            
+        key = (delta.originVMF, delta.vmfClass, delta.id)
+        
+        try:
+            return self.parentInfoCache[key]
+        except KeyError:
+            parentInfo = delta.originVMF.get_object_parent_info(
+                delta.vmfClass, delta.id
+            )
+            self.parentInfoCache[key] = parentInfo
+            return parentInfo
+            
+    def iter_processed_deltas(self, deltaKey):
+        ''' Returns an iterator over all merged and conflicted deltas with the 
+        given delta key.
+        
+        '''
+        
+        mergedDeltaForKey = self.mergedDeltaForKey
+        conflictedDeltasForKey = self.conflictedDeltasForKey
+        
+        if deltaKey in mergedDeltaForKey:
+            yield mergedDeltaForKey[deltaKey]
+            
+        if deltaKey in conflictedDeltasForKey:
+            for other in conflictedDeltasForKey[deltaKey]:
+                yield other
+                
+    def get_processed_delta(self, deltaKey):
+        ''' Returns a merged or conflicted delta with the given delta key, or 
+        None if there are none.
+        
+        Prefers the merged delta, like iter_processed_deltas() does.
+        
+        '''
+        
+        try:
+            return self.mergedDeltaForKey[deltaKey]
+        except KeyError:
+            pass
+            
+        try:
+            return self.conflictedDeltasForKey[deltaKey][0]
+        except KeyError:
+            return None
+            
+    def iter_value_conflicts(self, delta):
         ''' Returns an iterator over all merged and conflicted deltas that are 
-        "equivalent" to the given delta.
+        "equivalent" to the given property delta, but set a different value.
         
         '''
         
-        if delta in mergedDeltasDict:
-            yield mergedDeltasDict[delta]
+        deltaKey = (type(delta), delta._equiv)
+        
+        # Only scan the processed deltas if some other value has been seen.
+        values = self.valuesForKey.get(deltaKey)
+        if values is None or (
+                len(values) == 1
+                and _get_indexed_value(delta.value) in values):
+            return
             
-        if delta in conflictedDeltasDict:
-            for other in conflictedDeltasDict[delta]:
+        for other in self.iter_processed_deltas(deltaKey):
+            if other.value != delta.value:
                 yield other
                 
-    def add_conflicted_delta(delta):
-        ''' Adds the given delta to the conflictedDeltasDict, and removes it 
-        from the mergedDeltasDict (if applicable).
+    def add_property_value(self, deltaKey, delta):
+        ''' Records the value set by the given AddProperty/ChangeProperty 
+        delta, for use by iter_value_conflicts().
         
         '''
         
-        if verbose:
+        value = _get_indexed_value(delta.value)
+        
+        try:
+            self.valuesForKey[deltaKey].add(value)
+        except KeyError:
+            self.valuesForKey[deltaKey] = {value}
+            
+    def add_conflicted_delta(self, delta):
+        ''' Adds the given delta to the conflicted deltas, and removes it from 
+        the merged deltas (if applicable).
+        
+        '''
+        
+        mergedDeltaForKey = self.mergedDeltaForKey
+        conflictedDeltasForKey = self.conflictedDeltasForKey
+        deltaType = type(delta)
+        deltaKey = (deltaType, delta._equiv)
+        
+        if self.verbose:
             print(f"Marking {delta} as conflicted.")
             
-        # If the conflicting delta is in the mergedDeltasDict, remove it.
-        if delta in mergedDeltasDict and delta is mergedDeltasDict[delta]:
-            del mergedDeltasDict[delta]
+        # If the conflicting delta is merged, remove it.
+        if mergedDeltaForKey.get(deltaKey) is delta:
+            del mergedDeltaForKey[deltaKey]
+            self.firstMergedDeltaForKey.pop(deltaKey, None)
+            
+        if deltaType is AddProperty or deltaType is ChangeProperty:
+            self.add_property_value(deltaKey, delta)
             
         try:
-            conflictedDeltasDict[delta].append(delta)
+            conflictedDeltasForKey[deltaKey].append(delta)
         except KeyError:
-            conflictedDeltasDict[delta] = [delta]
+            conflictedDeltasForKey[deltaKey] = [delta]
             
-    def add_conflicted_tiesolid_delta(tieSolidDelta):
+    def add_conflicted_tiesolid_delta(self, tieSolidDelta):
         '''Adds the given TieSolid delta as a conflicted delta, while also
         marking corresponding AddObject, RemoveObject, and TieSolid deltas as
         conflicted if necessary.
         
         '''
         
+        VMF = vmf.VMF
+        mergedDeltaForKey = self.mergedDeltaForKey
+        add_conflicted_delta = self.add_conflicted_delta
+        
         assert isinstance(tieSolidDelta, TieSolid)
         
         add_conflicted_delta(tieSolidDelta)
         
         # We need to also mark the corresponding AddObject delta for the
         # entity as conflicted (if the entity is new).
-        addEntityDelta = AddObject(None, VMF.ENTITY, tieSolidDelta.entityId)
-        if addEntityDelta in mergedDeltasDict:
-            actualAddEntityDelta = mergedDeltasDict[addEntityDelta]
+        addEntityKey = (AddObject, (VMF.ENTITY, tieSolidDelta.entityId))
+        if addEntityKey in mergedDeltaForKey:
+            actualAddEntityDelta = mergedDeltaForKey[addEntityKey]
             add_conflicted_delta(actualAddEntityDelta)
             
         # We also need to mark the corresponding UntieSolid delta as conflicted
         # (if we're being retied to a new entity).
-        untieSolidDelta = UntieSolid(tieSolidDelta.solidId, None)
-        if untieSolidDelta in mergedDeltasDict:
-            actualUntieSolidDelta = mergedDeltasDict[untieSolidDelta]
+        untieSolidKey = (UntieSolid, (tieSolidDelta.solidId,))
+        if untieSolidKey in mergedDeltaForKey:
+            actualUntieSolidDelta = mergedDeltaForKey[untieSolidKey]
             add_conflicted_delta(actualUntieSolidDelta)
             
             # We also need to do the same thing with the corresponding
             # RemoveObject delta for the old entity.
-            removeObjectDelta = RemoveObject(
-                VMF.ENTITY, actualUntieSolidDelta.entityId
+            removeObjectKey = (
+                RemoveObject, (VMF.ENTITY, actualUntieSolidDelta.entityId)
             )
-            if removeObjectDelta in mergedDeltasDict:
-                actualRemoveObjectDelta = mergedDeltasDict[removeObjectDelta]
+            if removeObjectKey in mergedDeltaForKey:
+                actualRemoveObjectDelta = mergedDeltaForKey[removeObjectKey]
                 add_conflicted_delta(actualRemoveObjectDelta)
                 
-    def merge(delta):
-        ''' Attempts to merge the given delta into the mergedDeltasDict.
+    def cascade_removal_conflict(self, rootDelta):
+        ''' Marks the removal deltas for all of the given RemoveObject delta's 
+        sub-objects (and their sub-objects, and so on) as conflicted.
         
-        If a merge conflict is detected, emits a warning, and adds the 
-        conflicting deltas to conflictedDeltasDict.
+        The removal tree is walked depth-first with an explicit stack, 
+        visiting sub-objects in the same order as they appear in 
+        `cascadedRemovals`.
         
         '''
         
-        if verbose:
-            print(f"Merging {delta}...")
+        assert isinstance(rootDelta, RemoveObject)
+        
+        if rootDelta.cascadedRemovals is None:
+            return
+            
+        mergedDeltaForKey = self.mergedDeltaForKey
+        
+        stack = list(reversed(rootDelta.cascadedRemovals))
+        
+        while stack:
+            childInfo = stack.pop()
+            
+            try:
+                childRemovalDelta = mergedDeltaForKey[
+                    (RemoveObject, childInfo)
+                ]
+            except KeyError:
+                # The child's removal delta has already been marked as 
+                # conflicted, or the child was reparented.
+                assert (
+                    (RemoveObject, childInfo) in self.conflictedDeltasForKey
+                    or (ReparentObject, childInfo) in mergedDeltaForKey
+                )
+            else:
+                self.add_conflicted_delta(childRemovalDelta)
+                
+                cascadedRemovals = childRemovalDelta.cascadedRemovals
+                if cascadedRemovals is not None:
+                    stack.extend(reversed(cascadedRemovals))
+                    
+    def get_merge_method(self, DeltaType):
+        ''' Returns the bound method that merges deltas of the given type.
+        
+        The method attempts to merge the given delta into the merged deltas. 
+        If a merge conflict is detected, it adds the conflicting deltas to the 
+        conflicted deltas instead.
+        
+        '''
+        
+        return getattr(
+            self,
+            self.MERGE_METHODS.get(DeltaType, 'add_merged_delta'),
+        )
+        
+    def add_merged_delta(self, delta):
+        ''' Adds the given delta to the merged deltas, unless an equivalent 
+        delta has already been marked as conflicted.
+        
+        This is the final step of merging every delta that wasn't already 
+        found to be conflicted (or unnecessary) by its type-specific checks.
+        
+        '''
+        
+        mergedDeltaForKey = self.mergedDeltaForKey
+        deltaType = type(delta)
+        deltaKey = (deltaType, delta._equiv)
+        
+        # If an equivalent delta has already been marked conflicted, this delta
+        # should also be marked as conflicted.
+        if deltaKey in self.conflictedDeltasForKey:
+            self.add_conflicted_delta(delta)
+            return
+            
+        # Merge the delta into the dictionary. If an equivalent delta was 
+        # already merged, remember the first one, since that's the one that 
+        # ends up in the merge result.
+        if deltaKey in mergedDeltaForKey:
+            self.firstMergedDeltaForKey.setdefault(
+                deltaKey, mergedDeltaForKey[deltaKey]
+            )
+            
+        mergedDeltaForKey[deltaKey] = delta
+        
+        if deltaType is AddProperty or deltaType is ChangeProperty:
+            self.add_property_value(deltaKey, delta)
             
-        if isinstance(delta, AddObject) and delta.vmfClass == VMF.SIDE:
+    def merge_add_object(self, delta):
+        ''' Merges an AddObject delta. '''
+        
+        VMF = vmf.VMF
+        verbose = self.verbose
+        
+        if delta.vmfClass == VMF.SIDE:
             # If we are adding a Side to a Solid, this delta conflicts with any
             # other AddObject delta from other children that also adds a side
             # to the same solid. This is because it is extremely likely that
             # such changes, if uncoordinated, would result in an invalid solid!
+            addSidesDeltasForSolidId = self.addSidesDeltasForSolidId
+            add_conflicted_delta = self.add_conflicted_delta
+            
             parentClass, parentId = delta.parent
             assert parentClass == VMF.SOLID
             
@@ -706,9 +1035,10 @@ def merge_delta_lists(deltaLists, aggressive=False, verbose=False):
                     
                 if other.parent == delta.parent:
                     # Conflict!
-                    print("CONFLICT WARNING: AddObject conflict detected!")
-                    print(f"\tFrom {delta.get_origin_filename()}: {delta}")
-                    print(f"\tFrom {other.get_origin_filename()}: {other}")
+                    if verbose:
+                        print("CONFLICT WARNING: AddObject conflict detected!")
+                        print(f"\tFrom {delta.get_origin_filename()}: {delta}")
+                        print(f"\tFrom {other.get_origin_filename()}: {other}")
                     
                     add_conflicted_delta(delta)
                     add_conflicted_delta(other)
@@ -724,336 +1054,351 @@ def merge_delta_lists(deltaLists, aggressive=False, verbose=False):
             except KeyError:
                 addSidesDeltasForSolidId[parentId] = [delta]
                 
-        elif isinstance(delta, ChangeObject):
-            # Check for conflicts with RemoveObject deltas.
-            removeObjectDeltas = iter_processed_deltas(
-                RemoveObject(delta.vmfClass, delta.id)
-            )
-            
-            try:
-                other = next(removeObjectDeltas)
-            except StopIteration:
-                # Don't do anything if there are no RemoveObject deltas.
-                pass
-            else:
-                # Conflict!
+        self.add_merged_delta(delta)
+        
+    def merge_change_object(self, delta):
+        ''' Merges a ChangeObject delta. '''
+        
+        verbose = self.verbose
+        add_conflicted_delta = self.add_conflicted_delta
+        
+        # Check for conflicts with RemoveObject deltas.
+        other = self.get_processed_delta((RemoveObject, delta._equiv))
+        if other is not None:
+            # Conflict!
+            if verbose:
                 print(
                     "CONFLICT WARNING: ChangeObject delta conflicts with "
                     "RemoveObject delta!"
                 )
-                print("\tFrom {}:".format(delta.get_origin_filename()), delta)
-                print("\tFrom {}:".format(other.get_origin_filename()), other)
-                
-                add_conflicted_delta(delta)
-                add_conflicted_delta(other)
-                
-                # If a ChangeObject delta conflicts with a RemoveObject delta,
-                # then it also must conflict with all of the RemoveObject 
-                # deltas corresponding to the removed object's children.
-                
-                def cascade_removal_conflict(conflictedDelta):
-                    ''' Recursively marks the given delta's cascaded child 
-                    deltas as conflicted.
-                    
-                    '''
-                    
-                    assert isinstance(conflictedDelta, RemoveObject)
-                    
-                    cascadedRemovals = conflictedDelta.cascadedRemovals
+                print(f"\tFrom {delta.get_origin_filename()}: {delta}")
+                print(f"\tFrom {other.get_origin_filename()}: {other}")
+            
+            add_conflicted_delta(delta)
+            add_conflicted_delta(other)
+            
+            # If a ChangeObject delta conflicts with a RemoveObject delta,
+            # then it also must conflict with all of the RemoveObject 
+            # deltas corresponding to the removed object's children.
+            
+            self.cascade_removal_conflict(other)
+            
+            parentInfo = self.get_origin_parent_info(delta)
+            
+            if parentInfo is not None:
+                # If the parent object was removed, also mark that delta
+                # as conflicted if we haven't already.
+                try:
+                    parentRemovalDelta = self.mergedDeltaForKey[
+                        (RemoveObject, parentInfo)
+                    ]
+                except KeyError:
+                    # The parent wasn't removed.
+                    pass
+                else:
+                    add_conflicted_delta(parentRemovalDelta)
                     
-                    if cascadedRemovals is not None:
-                        for childClass, childId in cascadedRemovals:
-                            try:
-                                childRemovalDelta = mergedDeltasDict[
-                                    RemoveObject(childClass, childId)
-                                ]
-                            except KeyError:
-                                # The child's removal delta has already been
-                                # marked as conflicted, or the child was
-                                # reparented.
-                                assert (
-                                    RemoveObject(childClass, childId)
-                                        in conflictedDeltasDict
-                                    or ReparentObject(None, childClass, childId)
-                                        in mergedDeltasDict
-                                )
-                            else:
-                                add_conflicted_delta(childRemovalDelta)
-                                cascade_removal_conflict(childRemovalDelta)
-                                
-                cascade_removal_conflict(other)
+            return
+            
+        self.add_merged_delta(delta)
+        
+    def merge_add_property(self, delta):
+        ''' Merges an AddProperty delta. '''
+        
+        verbose = self.verbose
+        conflictedDeltasForKey = self.conflictedDeltasForKey
+        add_conflicted_delta = self.add_conflicted_delta
+        
+        # Is the corresponding ChangeObject or AddObject delta already 
+        # conflicted?
+        objectInfo = (delta.vmfClass, delta.id)
+        changeObjectKey = (ChangeObject, objectInfo)
+        addObjectKey = (AddObject, objectInfo)
+        
+        if (changeObjectKey in conflictedDeltasForKey
+                or addObjectKey in conflictedDeltasForKey):
                 
-                parentInfo = delta.originVMF.get_object_parent_info(
-                    delta.vmfClass, delta.id
+            if verbose:
+                relatedDeltas = (
+                    conflictedDeltasForKey[changeObjectKey]
+                    if changeObjectKey in conflictedDeltasForKey
+                        else conflictedDeltasForKey[addObjectKey]
                 )
                 
-                if parentInfo is not None:
-                    # If the parent object was removed, also mark that delta
-                    # as conflicted if we haven't already.
-                    parentClass, parentId = parentInfo
-                    
-                    try:
-                        parentRemovalDelta = mergedDeltasDict[
-                            RemoveObject(parentClass, parentId)
-                        ]
-                    except KeyError:
-                        # The parent wasn't removed.
-                        pass
-                    else:
-                        add_conflicted_delta(parentRemovalDelta)
-                        
-                return
-                
-        elif isinstance(delta, AddProperty):
-            # Is the corresponding ChangeObject or AddObject delta already 
-            # conflicted?
-            changeObjectDelta = ChangeObject(delta.vmfClass, delta.id)
-            addObjectDelta = AddObject(None, delta.vmfClass, delta.id)
-            
-            if (changeObjectDelta in conflictedDeltasDict
-                    or addObjectDelta in conflictedDeltasDict):
-                    
-                if verbose:
-                    relatedDeltas = (
-                        conflictedDeltasDict[changeObjectDelta]
-                        if changeObjectDelta in conflictedDeltasDict
-                            else conflictedDeltasDict[addObjectDelta]
-                    )
-                    
-                    print(
-                        f"{delta} is conflicted due to "
-                        f"{relatedDeltas} being conflicted."
-                    )
-                    
-                # If so, this delta is automatically also conflicted.
-                add_conflicted_delta(delta)
-                
-                return
+                print(
+                    f"{delta} is conflicted due to "
+                    f"{relatedDeltas} being conflicted."
+                )
                 
-            # Otherwise, check for conflicts with other AddProperty deltas.
-            for other in iter_processed_deltas(delta):
-                if other.value == delta.value:
-                    # Save an indent level.
-                    continue
-                    
-                # Conflict!
+            # If so, this delta is automatically also conflicted.
+            add_conflicted_delta(delta)
+            
+            return
+            
+        # Otherwise, check for conflicts with other AddProperty deltas.
+        for other in self.iter_value_conflicts(delta):
+            # Conflict!
+            if verbose:
                 print(
                     "CONFLICT WARNING: AddProperty conflict detected!"
                 )
-                print("\tFrom {}:".format(delta.get_origin_filename()), delta)
-                print("\tFrom {}:".format(other.get_origin_filename()), other)
+                print(f"\tFrom {delta.get_origin_filename()}: {delta}")
+                print(f"\tFrom {other.get_origin_filename()}: {other}")
+            
+            add_conflicted_delta(delta)
+            add_conflicted_delta(other)
+            
+            try:
+                # If our AddObject delta is not conflicted yet,
+                # it sure is now!
+                actualAddObjectDelta = self.mergedDeltaForKey[addObjectKey]
                 
-                add_conflicted_delta(delta)
-                add_conflicted_delta(other)
+            except KeyError:
+                # This isn't a new object.
+                pass
                 
-                try:
-                    # If our AddObject delta is not conflicted yet,
-                    # it sure is now!
-                    actualAddObjectDelta = mergedDeltasDict[addObjectDelta]
-                    
-                except KeyError:
-                    # This isn't a new object.
-                    pass
-                    
-                else:
-                    add_conflicted_delta(actualAddObjectDelta)
-                    
-                return
+            else:
+                add_conflicted_delta(actualAddObjectDelta)
                 
-        elif isinstance(delta, ChangeProperty):
-            # Is the corresponding ChangeObject delta already conflicted?
-            changeObjectDelta = ChangeObject(delta.vmfClass, delta.id)
-            if changeObjectDelta in conflictedDeltasDict:
-                # If so, this delta is automatically also conflicted.
-                add_conflicted_delta(delta)
+            return
+            
+        self.add_merged_delta(delta)
+        
+    def merge_change_property(self, delta):
+        ''' Merges a ChangeProperty delta. '''
+        
+        VMF = vmf.VMF
+        verbose = self.verbose
+        add_conflicted_delta = self.add_conflicted_delta
+        
+        # Is the corresponding ChangeObject delta already conflicted?
+        if (ChangeObject, (delta.vmfClass, delta.id)) in (
+                self.conflictedDeltasForKey):
+            # If so, this delta is automatically also conflicted.
+            add_conflicted_delta(delta)
+            return
+            
+        # If this is a VisGroup delta, check to see if the VisGroup was 
+        # removed.
+        if delta.vmfClass == VMF.VISGROUP:
+            if (RemoveObject, (VMF.VISGROUP, delta.id)) in (
+                    self.mergedDeltaForKey):
+                # The relevant VisGroup was removed; there's no need to 
+                # add the ChangeProperty delta.
                 return
                 
-            # If this is a VisGroup delta, check to see if the VisGroup was 
-            # removed.
-            if delta.vmfClass == VMF.VISGROUP:
-                removeVisGroupDelta = RemoveObject(VMF.VISGROUP, delta.id)
-                if removeVisGroupDelta in mergedDeltasDict:
-                    # The relevant VisGroup was removed; there's no need to 
-                    # add the ChangeProperty delta.
-                    return
-                    
-            # Check for conflicts with RemoveProperty deltas.
-            removePropertyDeltas = iter_processed_deltas(
-                RemoveProperty(delta.vmfClass, delta.id, delta.key)
-            )
-            
-            try:
-                other = next(removePropertyDeltas)
-            except StopIteration:
-                # Don't do anything if there are no RemoveProperty deltas.
-                pass
-            else:
-                # Conflict!
+        # Check for conflicts with RemoveProperty deltas.
+        other = self.get_processed_delta((RemoveProperty, delta._equiv))
+        if other is not None:
+            # Conflict!
+            if verbose:
                 print(
                     "CONFLICT WARNING: ChangeProperty delta conflicts "
                     "with RemoveProperty delta!"
                 )
-                print("\tFrom {}:".format(delta.get_origin_filename()), delta)
-                print("\tFrom {}:".format(other.get_origin_filename()), other)
-                
-                add_conflicted_delta(delta)
-                add_conflicted_delta(other)
-                return
-                
-            # Check for conflicts with other ChangeProperty deltas
-            # (except for editor color changes, which are inconsequential).
-            if delta.key != VMF.PROPERTY_DELIMITER.join(('editor', 'color')):
-                for other in iter_processed_deltas(delta):
-                    if other.value == delta.value:
-                        # Save an indent level.
-                        continue
-                        
-                    # Conflict!
+                print(f"\tFrom {delta.get_origin_filename()}: {delta}")
+                print(f"\tFrom {other.get_origin_filename()}: {other}")
+            
+            add_conflicted_delta(delta)
+            add_conflicted_delta(other)
+            return
+            
+        # Check for conflicts with other ChangeProperty deltas
+        # (except for editor color changes, which are inconsequential).
+        if delta.key != VMF.PROPERTY_DELIMITER.join(('editor', 'color')):
+            for other in self.iter_value_conflicts(delta):
+                # Conflict!
+                if verbose:
                     print(
                         "CONFLICT WARNING: ChangeProperty conflict "
                         "detected!"
                     )
                     print(f"\tFrom {delta.get_origin_filename()}: {delta}")
                     print(f"\tFrom {other.get_origin_filename()}: {other}")
-                    
-                    add_conflicted_delta(delta)
-                    add_conflicted_delta(other)
-                    return
-                    
-        elif isinstance(delta, TieSolid):
-            # Is the corresponding ChangeObject delta already conflicted?
-            changeObjectDelta = ChangeObject(VMF.SOLID, delta.solidId)
-            if changeObjectDelta in conflictedDeltasDict:
-                # If so, this delta is automatically also conflicted.
-                add_conflicted_tiesolid_delta(delta)
+                
+                add_conflicted_delta(delta)
+                add_conflicted_delta(other)
                 return
                 
-            # Check for conflicts with RemoveObject deltas.
-            removeObjectDeltas = iter_processed_deltas(
-                RemoveObject(VMF.SOLID, delta.solidId)
-            )
+        self.add_merged_delta(delta)
+        
+    def merge_tie_solid(self, delta):
+        ''' Merges a TieSolid delta. '''
+        
+        VMF = vmf.VMF
+        verbose = self.verbose
+        iter_processed_deltas = self.iter_processed_deltas
+        add_conflicted_tiesolid_delta = self.add_conflicted_tiesolid_delta
+        
+        # Is the corresponding ChangeObject delta already conflicted?
+        solidInfo = (VMF.SOLID, delta.solidId)
+        if (ChangeObject, solidInfo) in self.conflictedDeltasForKey:
+            # If so, this delta is automatically also conflicted.
+            add_conflicted_tiesolid_delta(delta)
+            return
             
-            try:
-                other = next(removeObjectDeltas)
-            except StopIteration:
-                # Don't do anything if there are no RemoveObject deltas.
-                pass
-            else:
-                # Conflict!
+        # Check for conflicts with RemoveObject deltas.
+        other = self.get_processed_delta((RemoveObject, solidInfo))
+        if other is not None:
+            # Conflict!
+            if verbose:
                 print(
                     "CONFLICT WARNING: TieSolid conflict detected!"
                 )
-                print("\tFrom {}:".format(delta.get_origin_filename()), delta)
-                print("\tFrom {}:".format(other.get_origin_filename()), other)
-                
-                add_conflicted_tiesolid_delta(delta)
-                return
+                print(f"\tFrom {delta.get_origin_filename()}: {delta}")
+                print(f"\tFrom {other.get_origin_filename()}: {other}")
+            
+            add_conflicted_tiesolid_delta(delta)
+            return
+            
+        # Check for conflicts with other TieSolid deltas.
+        for other in iter_processed_deltas((TieSolid, delta._equiv)):
+            if other.entityId == delta.entityId:
+                # Save an indent level.
+                continue
                 
-            # Check for conflicts with other TieSolid deltas.
-            for other in iter_processed_deltas(delta):
-                if other.entityId == delta.entityId:
-                    # Save an indent level.
-                    continue
-                    
-                # Conflict!
+            # Conflict!
+            if verbose:
                 print(
                     "CONFLICT WARNING: TieSolid conflict detected!"
                 )
-                print("\tFrom {}:".format(delta.get_origin_filename()), delta)
-                print("\tFrom {}:".format(other.get_origin_filename()), other)
-                
-                add_conflicted_tiesolid_delta(delta)
-                add_conflicted_tiesolid_delta(other)
-                return
-                
-        elif isinstance(delta, ReparentObject):
-            # Check to see if the object was removed.
-            removeObjectDelta = RemoveObject(delta.vmfClass, delta.id)
-            if removeObjectDelta in mergedDeltasDict:
-                # The relevant object was removed; there's no need to add 
-                # this delta.
-                return
-                
-        elif isinstance(delta, AddToVisGroup):
-            # Check to see if the VisGroup was removed, or if the relevant
-            # object was removed.
-            removeVisGroupDelta = RemoveObject(VMF.VISGROUP, delta.visGroupId)
-            removeObjectDelta = RemoveObject(delta.vmfClass, delta.id)
-            
-            if (removeVisGroupDelta in mergedDeltasDict
-                    or removeObjectDelta in mergedDeltasDict):
-                # The relevant VisGroup/object was removed; there's no need to 
-                # add this delta.
-                return
-                
-            # If the object is new, check to see if its corresponding
-            # AddObject delta was conflicted.
-            addObjectDelta = AddObject(None, delta.vmfClass, delta.id)
-            if addObjectDelta in conflictedDeltasDict:
-                # If the AddObject delta was conflicted, this delta should
-                # also be conflicted.
-                add_conflicted_delta(delta)
-                return
-                
-        # If an equivalent delta has already been marked conflicted, this delta
-        # should also be marked as conflicted.
-        if delta in conflictedDeltasDict:
-            add_conflicted_delta(delta)
+                print(f"\tFrom {delta.get_origin_filename()}: {delta}")
+                print(f"\tFrom {other.get_origin_filename()}: {other}")
+            
+            add_conflicted_tiesolid_delta(delta)
+            add_conflicted_tiesolid_delta(other)
             return
             
-        # Merge the delta into the dictionary.
-        mergedDeltasDict[delta] = delta
+        self.add_merged_delta(delta)
         
-    ##################
-    # End of merge() #
-    ##################
+    def merge_reparent_object(self, delta):
+        ''' Merges a ReparentObject delta. '''
+        
+        # Check to see if the object was removed.
+        if (RemoveObject, delta._equiv) in self.mergedDeltaForKey:
+            # The relevant object was removed; there's no need to add 
+            # this delta.
+            return
+            
+        self.add_merged_delta(delta)
+        
+    def merge_add_to_visgroup(self, delta):
+        ''' Merges an AddToVisGroup delta. '''
+        
+        VMF = vmf.VMF
+        mergedDeltaForKey = self.mergedDeltaForKey
+        
+        # Check to see if the VisGroup was removed, or if the relevant
+        # object was removed.
+        objectInfo = (delta.vmfClass, delta.id)
+        if ((RemoveObject, (VMF.VISGROUP, delta.visGroupId))
+                    in mergedDeltaForKey
+                or (RemoveObject, objectInfo) in mergedDeltaForKey):
+            # The relevant VisGroup/object was removed; there's no need to 
+            # add this delta.
+            return
+            
+        # If the object is new, check to see if its corresponding
+        # AddObject delta was conflicted.
+        if (AddObject, objectInfo) in self.conflictedDeltasForKey:
+            # If the AddObject delta was conflicted, this delta should
+            # also be conflicted.
+            self.add_conflicted_delta(delta)
+            return
+            
+        self.add_merged_delta(delta)
+        
+        
+def merge_delta_lists(deltaLists, aggressive=False, verbose=False):
+    """ Takes multiple lists of deltas, and merges them into a single list of
+    deltas that can be used to mutate the parent VMF into a merged VMF with 
+    all the required changes.
     
-    # Maps delta types to lists containing all deltas of that type.
-    deltasForDeltaType = OrderedDict(
-        (DeltaType, [])
-        for DeltaType in deltaTypes
+    If a conflict is detected, raises DeltaMergeConflict, with the exception's 
+    'partialDeltas' attribute set to the partial list of merged deltas with 
+    the conflicts removed.
+    
+    If `verbose` is True, each conflict is also reported as it is detected. 
+    Otherwise, the conflicted deltas are only reported through the exception.
+    
+    """
+    
+    # The delta types we care about, in the order that we care about.
+    deltaTypes = (
+        AddObject,
+        UntieSolid,
+        ReparentObject,
+        RemoveObject,
+        TieSolid,
+        ChangeObject,
+        AddProperty,
+        RemoveProperty,
+        ChangeProperty,
+        AddOutput,
+        RemoveOutput,
+        AddToVisGroup,
+        RemoveFromVisGroup,
+        # HideObject,
+        # UnHideObject,
     )
     
-    # Build the deltasForDeltaType dict.
+    merger = _DeltaMerger(verbose)
+    
+    # Maps delta types to lists containing all deltas of that type.
+    deltasForDeltaType = {DeltaType: [] for DeltaType in deltaTypes}
+    
+    # Build the deltasForDeltaType dict, skipping any delta types that we 
+    # don't care about.
+    get_deltas_for_type = deltasForDeltaType.get
     for deltas in deltaLists:
         for delta in deltas:
-            deltasForDeltaType[type(delta)].append(delta)
+            deltasOfType = get_deltas_for_type(type(delta))
+            if deltasOfType is not None:
+                deltasOfType.append(delta)
             
-    # Reverse the RemoveObject delta list, to allow for cascaded merge 
-    # conflict detection.
-    deltasForDeltaType[RemoveObject].reverse()
-    
     # Merge!
-    for deltas in deltasForDeltaType.values():
+    for DeltaType, deltas in deltasForDeltaType.items():
+        # Walk the RemoveObject deltas in reverse, to allow for cascaded merge 
+        # conflict detection.
+        if DeltaType is RemoveObject:
+            deltas = reversed(deltas)
+            
+        # All of the deltas in this group have the same type, so look up the 
+        # merge method once for the whole group.
+        merge = merger.get_merge_method(DeltaType)
+        
         for delta in deltas:
+            if verbose:
+                print(f"Merging {delta}...")
+                
             merge(delta)
             
-    # The result is simply the list of keys in the mergedDeltasDict.
-    mergedDeltas = list(mergedDeltasDict.keys())
+    mergedDeltas = merger.get_merged_deltas()
     
-    if conflictedDeltasDict:
+    if merger.conflictedDeltasForKey:
         # Uh oh, there were conflicts!
         
-        # Flatten the conflicts dictionary.
-        conflictedDeltas = [
-            delta
-            for deltas in conflictedDeltasDict.values()
-                for delta in deltas
-        ]
+        # Flatten the conflicts dictionary, grouping the conflicted deltas by 
+        # type in the same order as deltaTypes.
+        conflictedDeltasForDeltaType = {
+            DeltaType: [] for DeltaType in deltaTypes
+        }
         
         # Deduplicate the conflicting deltas by identity, since there's a fair
         # chance that a number of them were added multiple times.
-        uniqueConflictedDeltas = []
         conflictedDeltaIds = set()
-        for conflictedDelta in conflictedDeltas:
+        for conflictedDelta in chain.from_iterable(
+                merger.conflictedDeltasForKey.values()):
             conflictedDeltaId = id(conflictedDelta)
             if conflictedDeltaId not in conflictedDeltaIds:
-                uniqueConflictedDeltas.append(conflictedDelta)
+                conflictedDeltasForDeltaType[type(conflictedDelta)].append(
+                    conflictedDelta
+                )
                 conflictedDeltaIds.add(conflictedDeltaId)
                 
-        conflictedDeltas = uniqueConflictedDeltas
-        
-        conflictedDeltas.sort(key=lambda delta: deltaTypes.index(type(delta)))
+        conflictedDeltas = list(
+            chain.from_iterable(conflictedDeltasForDeltaType.values())
+        )
         
         raise DeltaMergeConflict(mergedDeltas, conflictedDeltas)
         
@@ -1061,6 +1406,21 @@ def merge_delta_lists(deltaLists, aggressive=False, verbose=False):
         return mergedDeltas
         
         
+def _create_conflict_visgroup_deltas(parentInfo, visGroupId, visGroupName):
+    """ Returns a tuple of the deltas that add a new, red conflict resolution 
+    VisGroup with the given ID and name under the given parent VisGroup.
+    
+    """
+    
+    VMF = vmf.VMF
+    
+    return (
+        AddObject(parentInfo, VMF.VISGROUP, visGroupId),
+        AddProperty(VMF.VISGROUP, visGroupId, 'name', visGroupName),
+        AddProperty(VMF.VISGROUP, visGroupId, 'color', '255 0 0'),
+    )
+    
+    
 def create_conflict_resolution_deltas(parent, conflictedDeltas, verbose=False):
     """ Takes a parent VMF and a list of conflicted deltas for that VMF, and 
     returns new deltas that, when applied to the parent, will create new 
@@ -1068,38 +1428,50 @@ def create_conflict_resolution_deltas(parent, conflictedDeltas, verbose=False):
     
     """
     
+    return list(
+        iter_conflict_resolution_deltas(
+            parent, conflictedDeltas,
+            verbose=verbose,
+        )
+    )
+    
+    
+def iter_conflict_resolution_deltas(parent, conflictedDeltas, verbose=False):
+    """ Like create_conflict_resolution_deltas(), but yields the new deltas 
+    one at a time as they are created, instead of returning them as a list.
+    
+    The new VisGroup and clone IDs are reserved on the parent as the deltas 
+    are generated, so the deltas should be consumed before the parent is 
+    otherwise modified.
+    
+    """
+    
     # Because otherwise we get circular imports if we use 
     # `from vmf import VMF`. Ugh.
     VMF = vmf.VMF
     
-    result = []
+    # Parent VMF lookups that are made for many of the conflicted deltas.
+    get_object_parent_info = parent.get_object_parent_info
+    has_object = parent.has_object
+    entityIdForSolidId = parent.entityIdForSolidId
     
     # Create the root conflict resolution VisGroup.
     conflictVisGroupId = parent.next_available_id(VMF.VISGROUP)
     conflictVisGroupInfo = (VMF.VISGROUP, conflictVisGroupId)
-    result.append(AddObject(None, VMF.VISGROUP, conflictVisGroupId))
-    result.append(
-        AddProperty(
-            VMF.VISGROUP, conflictVisGroupId,
-            'name', "Manual Merge Required",
-        )
-    )
-    result.append(
-        AddProperty(
-            VMF.VISGROUP, conflictVisGroupId,
-            'color', '255 0 0',
-        )
+    newDeltas = _create_conflict_visgroup_deltas(
+        None, conflictVisGroupId, "Manual Merge Required",
     )
+    yield from newDeltas
     
     visgroupNameForId = {}
     
     if verbose:
-        print(f"Create root conflict resolution VisGroup: {result[-3:]}")
+        print(f"Create root conflict resolution VisGroup: {list(newDeltas)}")
     
     def create_conflict_visgroup(visGroupName):
-        ''' Adds deltas to `result` that create a new conflict resolution 
-        VisGroup with the given name under the root conflict VisGroup, and
-        returns the ID of the new VisGroup.
+        ''' Yields the deltas that create a new conflict resolution VisGroup 
+        with the given name under the root conflict VisGroup, and returns the 
+        ID of the new VisGroup.
         
         '''
         
@@ -1107,36 +1479,24 @@ def create_conflict_resolution_deltas(parent, conflictedDeltas, verbose=False):
         
         visgroupNameForId[visGroupId] = visGroupName
         
-        result.append(
-            AddObject(
-                conflictVisGroupInfo,
-                VMF.VISGROUP, visGroupId,
-            )
-        )
-        result.append(
-            AddProperty(
-                VMF.VISGROUP, visGroupId,
-                'name', visGroupName,
-            )
-        )
-        result.append(
-            AddProperty(
-                VMF.VISGROUP, visGroupId,
-                'color', '255 0 0',
-            )
+        newDeltas = _create_conflict_visgroup_deltas(
+            conflictVisGroupInfo, visGroupId, visGroupName,
         )
+        yield from newDeltas
         
         if verbose:
             print(
                 f"Create conflict resolution VisGroup '{visGroupName}': "
-                f"{result[-3:]}"
+                f"{list(newDeltas)}"
             )
         
         return visGroupId
         
     # Create the parent's conflict resolution VisGroup, that holds the 
     # original objects as the were in the parent.
-    parentVisGroupId = create_conflict_visgroup(os.path.basename(parent.path))
+    parentVisGroupId = yield from create_conflict_visgroup(
+        os.path.basename(parent.path)
+    )
     
     # Maps each child VMF to its respective conflict resolution VisGroup.
     changedVisGroupIdForChild = {}
@@ -1146,6 +1506,9 @@ def create_conflict_resolution_deltas(parent, conflictedDeltas, verbose=False):
         ''' Get (or create, then get, if necessary) the given child's "changed"
         conflict resolution VisGroup.
         
+        This is a generator that yields the new VisGroup's deltas (if any), 
+        and returns the VisGroup's ID; use it with `yield from`.
+        
         '''
         
         assert child is not parent
@@ -1155,7 +1518,7 @@ def create_conflict_resolution_deltas(parent, conflictedDeltas, verbose=False):
         except KeyError:
             # Create the conflict resolution VisGroup if it 
             # doesn't exist.
-            childVisGroupId = create_conflict_visgroup(
+            childVisGroupId = yield from create_conflict_visgroup(
                 "Changed in {}".format(os.path.basename(child.path))
             )
             changedVisGroupIdForChild[child] = childVisGroupId
@@ -1166,6 +1529,9 @@ def create_conflict_resolution_deltas(parent, conflictedDeltas, verbose=False):
         ''' Get (or create, then get, if necessary) the given child's "removed"
         conflict resolution VisGroup.
         
+        This is a generator that yields the new VisGroup's deltas (if any), 
+        and returns the VisGroup's ID; use it with `yield from`.
+        
         '''
         
         assert child is not parent
@@ -1175,7 +1541,7 @@ def create_conflict_resolution_deltas(parent, conflictedDeltas, verbose=False):
         except KeyError:
             # Create the conflict resolution VisGroup if it 
             # doesn't exist.
-            childVisGroupId = create_conflict_visgroup(
+            childVisGroupId = yield from create_conflict_visgroup(
                 "Removed in {}".format(os.path.basename(child.path))
             )
             removedVisGroupIdForChild[child] = childVisGroupId
@@ -1186,9 +1552,14 @@ def create_conflict_resolution_deltas(parent, conflictedDeltas, verbose=False):
     # its cloned object info for that child.
     cloneIdForObjectInfoForChild = {}
     
-    # Set of AddToVisGroup deltas that we use to deduplicate deltas that add 
-    # an affected object to a conflict resolution VisGroup.
-    newAddToVisGroupDeltas = set()
+    # Set of (vmfClass, id, visGroupId) tuples that we use to deduplicate 
+    # deltas that add an affected object to a conflict resolution VisGroup.
+    newAddToVisGroupInfos = set()
+    
+    # Caches the results of get_top_level_object(), since conflicted deltas 
+    # tend to point at the Sides and Solids of the same few objects.
+    # Maps object infos to the infos of their topmost containers.
+    topLevelInfoForObjectInfo = {}
     
     def get_top_level_object(vmfClass, id):
         ''' Given the info for some VMF object, return the info of the topmost
@@ -1199,27 +1570,34 @@ def create_conflict_resolution_deltas(parent, conflictedDeltas, verbose=False):
         
         '''
         
+        objectInfo = (vmfClass, id)
+        
+        try:
+            return topLevelInfoForObjectInfo[objectInfo]
+        except KeyError:
+            pass
+            
+        # Climb from a Side to its Solid...
         if vmfClass == VMF.SIDE:
-            vmfClass, id = parent.get_object_parent_info(vmfClass, id)
+            vmfClass, id = get_object_parent_info(vmfClass, id)
             assert vmfClass == VMF.SOLID
             
-            vmfClass, id = get_top_level_object(vmfClass, id)
-            assert vmfClass in (VMF.ENTITY, VMF.SOLID)
-            
-        elif vmfClass == VMF.SOLID:
-            if id in parent.entityIdForSolidId:
-                vmfClass, id = parent.get_object_parent_info(vmfClass, id)
-                assert vmfClass == VMF.ENTITY
-                
-            assert vmfClass in (VMF.ENTITY, VMF.SOLID)
+        # ... and from a tied Solid to its Entity.
+        if vmfClass == VMF.SOLID and id in entityIdForSolidId:
+            assert get_object_parent_info(vmfClass, id) == (
+                VMF.ENTITY, entityIdForSolidId[id]
+            )
+            vmfClass, id = VMF.ENTITY, entityIdForSolidId[id]
             
+        topLevelInfoForObjectInfo[objectInfo] = (vmfClass, id)
+        
         return vmfClass, id
         
     def add_add_to_visgroup_delta(
             objectInfo, visgroupId,
             useTiedSolidCorrection=False,
             ):
-        ''' Add a new AddToVisGroup delta with the given info, but only once.
+        ''' Yield a new AddToVisGroup delta with the given info, but only once.
         
         If `useTiedSolidCorrection` is True, and the given object is a solid 
         that has been tied to an entity, we add the ENTITY to the VisGroup 
@@ -1228,34 +1606,32 @@ def create_conflict_resolution_deltas(parent, conflictedDeltas, verbose=False):
         
         '''
         
-        if useTiedSolidCorrection:
-            parentObjectInfo = parent.get_object_parent_info(*objectInfo)
-            if parentObjectInfo is not None:
-                parentObjectClass, parentObjectId = parentObjectInfo
-                
-                if parentObjectClass == VMF.ENTITY:
-                    assert objectClass == VMF.SOLID
-                    
-                    print(
-                        f"Correcting VisGroup addition info "
-                        f"for tied solid {objectInfo} "
-                        f"to {parentObjectInfo}"
-                    )
-                    
-                    # If we're adding a tied solid to a VisGroup, we
-                    # should add the tied entity instead, since Hammer is
-                    # dumb and doesn't correctly associate VisGroups with
-                    # individual tied solids in an entity.
-                    objectInfo = parentObjectInfo
-                    
         objectClass, objectId = objectInfo
         
-        newDelta = AddToVisGroup(objectClass, objectId, visgroupId)
-        
+        if (useTiedSolidCorrection
+                and objectClass == VMF.SOLID
+                and objectId in entityIdForSolidId):
+                
+            parentObjectInfo = (VMF.ENTITY, entityIdForSolidId[objectId])
+            
+            print(
+                f"Correcting VisGroup addition info "
+                f"for tied solid {objectInfo} "
+                f"to {parentObjectInfo}"
+            )
+            
+            # If we're adding a tied solid to a VisGroup, we should add the 
+            # tied entity instead, since Hammer is dumb and doesn't correctly 
+            # associate VisGroups with individual tied solids in an entity.
+            objectInfo = parentObjectInfo
+            objectClass, objectId = objectInfo
+            
         # Don't add this delta more than once.
-        if newDelta not in newAddToVisGroupDeltas:
-            result.append(newDelta)
-            newAddToVisGroupDeltas.add(newDelta)
+        addToVisGroupInfo = (objectClass, objectId, visgroupId)
+        if addToVisGroupInfo not in newAddToVisGroupInfos:
+            newDelta = AddToVisGroup(objectClass, objectId, visgroupId)
+            yield newDelta
+            newAddToVisGroupInfos.add(addToVisGroupInfo)
             
             if verbose:
                 print(
@@ -1268,12 +1644,26 @@ def create_conflict_resolution_deltas(parent, conflictedDeltas, verbose=False):
     
     conflictedNewObjectInfos = set()
     
+    # Deltas of these types always affect the entity given by their entityId.
+    entityDeltaTypes = frozenset((AddOutput, RemoveOutput, UntieSolid))
+    
+    # Objects of these classes are never cloned.
+    unclonableClasses = frozenset((VMF.WORLD, VMF.GROUP, VMF.VISGROUP))
+    
+    # Removals of objects of these classes are pointed at the objects' clones,
+    # if they have any.
+    retargetedRemovalClasses = frozenset((VMF.SOLID, VMF.SIDE))
+    
     # First pass: Clone every object that needs to be cloned.
     for delta in conflictedDeltas:
         child = delta.originVMF
+        deltaType = type(delta)
         
-        if child not in cloneIdForObjectInfoForChild:
-            cloneIdForObjectInfoForChild[child] = {}
+        try:
+            cloneIdForObjectInfo = cloneIdForObjectInfoForChild[child]
+        except KeyError:
+            cloneIdForObjectInfo = {}
+            cloneIdForObjectInfoForChild[child] = cloneIdForObjectInfo
             
         if verbose:
             print(
@@ -1282,14 +1672,12 @@ def create_conflict_resolution_deltas(parent, conflictedDeltas, verbose=False):
             )
         # Get information about the object that would have been affected by 
         # the delta's change.
-        if (isinstance(delta, AddOutput)
-                or isinstance(delta, RemoveOutput)
-                or isinstance(delta, UntieSolid)):
+        if deltaType in entityDeltaTypes:
             cloneTargetClass = VMF.ENTITY
             cloneTargetId = delta.entityId
             
-        elif isinstance(delta, TieSolid):
-            if parent.has_object(VMF.ENTITY, delta.entityId):
+        elif deltaType is TieSolid:
+            if has_object(VMF.ENTITY, delta.entityId):
                 cloneTargetClass = VMF.ENTITY
                 cloneTargetId = delta.entityId
             else:
@@ -1297,7 +1685,7 @@ def create_conflict_resolution_deltas(parent, conflictedDeltas, verbose=False):
                 cloneTargetClass = VMF.SOLID
                 cloneTargetId = delta.solidId
                 
-        elif isinstance(delta, AddObject):
+        elif deltaType is AddObject:
             # No need to directly clone new objects, that would be weird and
             # broken.
             if verbose:
@@ -1314,12 +1702,6 @@ def create_conflict_resolution_deltas(parent, conflictedDeltas, verbose=False):
             # To drastically simplify things regarding conflicted deltas that
             # point to the new object, pretend that the "clone" of the new
             # object is itself.
-            try:
-                cloneIdForObjectInfo = cloneIdForObjectInfoForChild[child]
-            except KeyError:
-                cloneIdForObjectInfo = {}
-                cloneIdForObjectInfoForChild[child] = cloneIdForObjectInfo
-                
             cloneIdForObjectInfo[newObjectInfo] = delta.id
             
             # However, if this delta is adding a new Side to a Solid, we need
@@ -1333,7 +1715,7 @@ def create_conflict_resolution_deltas(parent, conflictedDeltas, verbose=False):
             else:
                 continue
                 
-        elif isinstance(delta, AddProperty):
+        elif deltaType is AddProperty:
             objectInfo = (delta.vmfClass, delta.id)
             
             if objectInfo not in conflictedNewObjectInfos:
@@ -1352,7 +1734,7 @@ def create_conflict_resolution_deltas(parent, conflictedDeltas, verbose=False):
                     
                 # We should have already seen this object and neglected to
                 # clone it.
-                assert objectInfo in cloneIdForObjectInfoForChild[child]
+                assert objectInfo in cloneIdForObjectInfo
                 
                 continue
                 
@@ -1361,7 +1743,7 @@ def create_conflict_resolution_deltas(parent, conflictedDeltas, verbose=False):
                 delta.vmfClass, delta.id
             )
             
-        if cloneTargetClass in (VMF.WORLD, VMF.GROUP, VMF.VISGROUP):
+        if cloneTargetClass in unclonableClasses:
             # Do NOT touch the World, Groups, or VisGroups!
             # Those conflicts will just have to be fixed without the aid of 
             # conflict resolution VisGroups.
@@ -1387,7 +1769,7 @@ def create_conflict_resolution_deltas(parent, conflictedDeltas, verbose=False):
                 
             continue
             
-        if (isinstance(delta, RemoveObject)
+        if (deltaType is RemoveObject
                 and cloneTargetInfo == (delta.vmfClass, delta.id)):
                 
             # If the clone target is actually the object that the RemoveObject
@@ -1404,12 +1786,6 @@ def create_conflict_resolution_deltas(parent, conflictedDeltas, verbose=False):
                 
             continue
             
-        try:
-            cloneIdForObjectInfo = cloneIdForObjectInfoForChild[child]
-        except KeyError:
-            cloneIdForObjectInfo = {}
-            cloneIdForObjectInfoForChild[child] = cloneIdForObjectInfo
-            
         if cloneTargetInfo in cloneIdForObjectInfo:
             # This object was already cloned; no need to do it again.
             
@@ -1427,7 +1803,7 @@ def create_conflict_resolution_deltas(parent, conflictedDeltas, verbose=False):
             cloneTargetClass, cloneTargetId,
             cloneIdsDict=cloneIdsDict,
         )
-        result += cloneDeltas
+        yield from cloneDeltas
         
         if verbose:
             print(f"Clone object {cloneTargetInfo}: {cloneDeltas}")
@@ -1439,12 +1815,15 @@ def create_conflict_resolution_deltas(parent, conflictedDeltas, verbose=False):
         
         # Add the cloned object to the child's conflict resolution VisGroup.
         cloneId = cloneIdForObjectInfo[cloneTargetInfo]
-        childVisGroupId = get_changed_visgroup(child)
-        add_add_to_visgroup_delta((cloneTargetClass, cloneId), childVisGroupId)
+        childVisGroupId = yield from get_changed_visgroup(child)
+        yield from add_add_to_visgroup_delta(
+            (cloneTargetClass, cloneId),
+            childVisGroupId,
+        )
         
         # Add the original object to the parent's conflict resolution VisGroup,
         # if it's not already set to be deleted.
-        add_add_to_visgroup_delta(
+        yield from add_add_to_visgroup_delta(
             (cloneTargetClass, cloneTargetId),
             parentVisGroupId,
         )
@@ -1477,16 +1856,14 @@ def create_conflict_resolution_deltas(parent, conflictedDeltas, verbose=False):
                 f"from {child.get_filename()}..."
             )
             
-        if isinstance(delta, AddObject):
+        deltaType = type(delta)
+        
+        if deltaType is AddObject:
             # If this is a new Side, and its Solid has been cloned, point the
             # delta at the clone.
             if delta.vmfClass == VMF.SIDE:
                 if delta.parent in cloneIdForObjectInfo:
-                    cloneDelta = copy.copy(delta)
-                    cloneDelta.parent = (
-                        VMF.SOLID,
-                        cloneIdForObjectInfo[delta.parent],
-                    )
+                    cloneDelta = delta.remap_ids(cloneIdForObjectInfo)
                     delta = cloneDelta
                     
                     if verbose:
@@ -1497,51 +1874,39 @@ def create_conflict_resolution_deltas(parent, conflictedDeltas, verbose=False):
                         
                     # Add the Solid to the child's changed conflict 
                     # resolution VisGroup.
-                    childVisGroupId = get_changed_visgroup(child)
-                    add_add_to_visgroup_delta(
+                    childVisGroupId = yield from get_changed_visgroup(child)
+                    yield from add_add_to_visgroup_delta(
                         cloneDelta.parent,
                         childVisGroupId,
                     )
                     
-                result.append(delta)
+                yield delta
                 
             else:
                 # Add the delta, since we need the object to exist before 
                 # performing any other operations on it.
-                result.append(delta)
+                yield delta
                 
                 if verbose:
                     print(delta)
                     
                 # Add the affected object to the child's changed conflict 
                 # resolution VisGroup.
-                childVisGroupId = get_changed_visgroup(child)
-                add_add_to_visgroup_delta(
+                childVisGroupId = yield from get_changed_visgroup(child)
+                yield from add_add_to_visgroup_delta(
                     (delta.vmfClass, delta.id),
                     childVisGroupId,
                 )
                 
-        elif isinstance(delta, RemoveObject):
+        elif deltaType is RemoveObject:
             affectedObjectInfo = (delta.vmfClass, delta.id)
             
-            if (delta.vmfClass in (VMF.SOLID, VMF.SIDE)
+            if (delta.vmfClass in retargetedRemovalClasses
                     and affectedObjectInfo in cloneIdForObjectInfo):
                 # If there is a clone of the affected solid or side, point the
                 # delta at the clone.
-                cloneDelta = copy.copy(delta)
-                cloneDelta.id = cloneIdForObjectInfo[affectedObjectInfo]
-                
-                # Fix up the cascaded removals as well.
-                # Probably not really necessary, but we may as well do it.
-                if delta.cascadedRemovals is not None:
-                    cloneDelta.cascadedRemovals = delta.cascadedRemovals[:]
-                    for i, subObjectInfo in enumerate(delta.cascadedRemovals):
-                        subClass, _ = subObjectInfo
-                        cloneDelta.cascadedRemovals[i] = (
-                            subClass, cloneIdForObjectInfo[subObjectInfo]
-                        )
-                        
-                result.append(cloneDelta)
+                cloneDelta = delta.remap_ids(cloneIdForObjectInfo)
+                yield cloneDelta
                 
                 if verbose:
                     print(f"Fixed up delta to target clones: {cloneDelta}")
@@ -1549,67 +1914,39 @@ def create_conflict_resolution_deltas(parent, conflictedDeltas, verbose=False):
             else:
                 # Otherwise, add the affected object to the child's removal
                 # conflict resolution VisGroup.
-                childVisGroupId = get_removed_visgroup(child)
-                add_add_to_visgroup_delta(affectedObjectInfo, childVisGroupId)
+                childVisGroupId = yield from get_removed_visgroup(child)
+                yield from add_add_to_visgroup_delta(
+                    affectedObjectInfo,
+                    childVisGroupId,
+                )
                 
                 # We should never encounter a situation where a RemoveObject
                 # delta affecting a Side or a tied Solid would not be able to
                 # point to a valid clone.
                 assert delta.vmfClass != VMF.SIDE
                 assert (
-                    parent.get_object_parent_info(
+                    get_object_parent_info(
                         delta.vmfClass, delta.id
                         ) is None
-                    or parent.get_object_parent_info(
+                    or get_object_parent_info(
                         delta.vmfClass, delta.id
                         )[0] != VMF.ENTITY
                 )
                 
-        elif isinstance(delta, TieSolid) or isinstance(delta, UntieSolid):
-            solidId = delta.solidId
-            entityId = delta.entityId
-            
-            cloneDelta = copy.copy(delta)
-            
-            # Fix up the Solid ID to point at the clone.
-            # This should ALWAYS exist.
-            cloneDelta.solidId = cloneIdForObjectInfo[(VMF.SOLID, solidId)]
-            
-            # Fix up the Entity ID to point at the clone.
-            # The clone may not exist if the entity itself is new.
-            try:
-                cloneDelta.entityId = cloneIdForObjectInfo[
-                    (VMF.ENTITY, entityId)
-                ]
-            except KeyError:
-                # If there's no clone, then the entity must be new.
-                assert not parent.has_object(VMF.ENTITY, delta.entityId)
+        else:
+            if deltaType is TieSolid or deltaType is UntieSolid:
+                # If the Entity has no clone, then it must be new.
+                assert (
+                    (VMF.ENTITY, delta.entityId) in cloneIdForObjectInfo
+                    or not has_object(VMF.ENTITY, delta.entityId)
+                )
                 
-            result.append(cloneDelta)
+            # Point the delta at the clones of the objects it affects.
+            cloneDelta = delta.remap_ids(cloneIdForObjectInfo)
+            yield cloneDelta
             
             if verbose:
                 print(f"Fixed up delta to target clones: {cloneDelta}")
                 
-        elif isinstance(delta, AddOutput) or isinstance(delta, RemoveOutput):
-            affectedObjectInfo = (delta.vmfClass, delta.entityId)
-            
-            cloneDelta = copy.copy(delta)
-            cloneDelta.entityId = cloneIdForObjectInfo[affectedObjectInfo]
-            result.append(cloneDelta)
-            
-            if verbose:
-                print(f"Fixed up delta to target clone: {cloneDelta}")
-                
-        else:
-            affectedObjectInfo = (delta.vmfClass, delta.id)
-            
-            cloneDelta = copy.copy(delta)
-            cloneDelta.id = cloneIdForObjectInfo[affectedObjectInfo]
-            result.append(cloneDelta)
-            
-            if verbose:
-                print(f"Fixed up delta to target clone: {cloneDelta}")
-                
-    return result
     
     
\ No newline at end of file
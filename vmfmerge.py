@@ -13,11 +13,11 @@ __version__ = '0.1.2 BETA'
 
 import os
 import sys
+import gc
 import copy
-import shutil
 from datetime import datetime
 from argparse import ArgumentParser
-from collections import OrderedDict
+from contextlib import contextmanager
 
 from vmf import VMF, InvalidVMF, load_vmfs, get_parent, compare_vmfs
 from vmfdelta import (
@@ -87,6 +87,43 @@ def parse_args(argv):
     return parser.parse_args(argv)
     
     
+def print_deltas(deltas):
+    """ Prints the given deltas to stdout, one per line.
+    
+    The deltas are written out one at a time, rather than being joined into 
+    one big string first, since there can be a great many of them.
+    
+    """
+    
+    write = sys.stdout.write
+    for delta in deltas:
+        write(repr(delta))
+        write('\n')
+        
+        
+@contextmanager
+def gc_paused():
+    """ Context manager that disables the cyclic garbage collector for the 
+    duration of its block, then restores its previous state.
+    
+    Comparing and merging VMFs allocates a great many small objects, so the 
+    collector would keep rescanning them while they're still in use. This is 
+    only safe because none of those objects (including the delta merger 
+    itself) are part of a reference cycle, so reference counting still frees 
+    them as soon as they're dropped, collector or no collector.
+    
+    """
+    
+    wasEnabled = gc.isenabled()
+    gc.disable()
+    
+    try:
+        yield
+    finally:
+        if wasEnabled:
+            gc.enable()
+            
+            
 def do_merge(
         parent, children,
         dumpIndividual=False, dumpProposed=False,
@@ -133,8 +170,8 @@ def do_merge(
         def __init__(self, children):
             self.progress = 0
             self.maxProgress = (
-                int(noParentSideEffects)
-                + int(noChildSideEffects) * len(children)
+                int(noParentSideEffects and not dumping)
+                + len(childIndicesToCopy)
                 + len(children)
                 + self.NUM_MERGE_STEPS
             )
@@ -161,48 +198,71 @@ def do_merge(
             if postIncrement:
                 self.progress += 1
                 
-    # We're gonna be modifying this soon.
-    children = children[:]
+    # We're gonna be modifying this soon, but only if we're swapping in
+    # copies of the children.
+    if noChildSideEffects:
+        children = list(children)
+        
+    dumping = dumpIndividual or dumpProposed
     
+    # Comparing a child that is identical to the parent has no side-effects 
+    # on the child, so such children never need to be copied.
+    if noChildSideEffects:
+        childIndicesToCopy = [
+            i for i, child in enumerate(children)
+            if not child.has_same_contents(parent)
+        ]
+    else:
+        childIndicesToCopy = []
+        
     progressTracker = ProgressTracker(children)
     
     # If we don't want side-effects on the parent VMF, we should deep-copy it.
     if noParentSideEffects:
-        progressTracker.update("Preparing parent VMF for merge...")
-        parent = copy.deepcopy(parent)
-        
+        if dumping:
+            # The dump modes never apply any deltas to the parent, so the only 
+            # parent state they change is its ID counters. A shallow copy with 
+            # its own counters is enough to leave the original untouched.
+            parent = copy.copy(parent)
+            parent.lastIdForVmfClass = dict(parent.lastIdForVmfClass)
+        else:
+            progressTracker.update("Preparing parent VMF for merge...")
+            parent = copy.deepcopy(parent)
+            
     # If we don't want side-effects on the child VMFs, we should deep-copy them.
-    if noChildSideEffects:
+    for i in childIndicesToCopy:
+        child = children[i]
+        progressTracker.update(
+            "Preparing {} for merge...".format(child.get_filename())
+        )
+        children[i] = copy.deepcopy(child)
+            
+    # Generate lists of deltas for each child.
+    deltaListForChild = {}
+    with gc_paused():
         for i, child in enumerate(children):
             progressTracker.update(
-                "Preparing {} for merge...".format(child.get_filename())
+                "Generating delta list for {}...".format(
+                    os.path.basename(child.path)
+                )
             )
-            children[i] = copy.deepcopy(child)
+            deltas = compare_vmfs(parent, child)
+            deltaListForChild[child] = deltas
             
-    # Generate lists of deltas for each child.
-    deltaListForChild = OrderedDict()
-    for i, child in enumerate(children):
-        progressTracker.update(
-            "Generating delta list for {}...".format(
-                os.path.basename(child.path)
-            )
-        )
-        deltas = compare_vmfs(parent, child)
-        deltaListForChild[child] = deltas
-    
+            # Our own copies of the children are only needed for their 
+            # deltas from here on, so there's no need to keep their data 
+            # around for the rest of the merge.
+            if not dumpIndividual and i in childIndicesToCopy:
+                child.discard_geometry()
+                
     if dumpIndividual:
         for child, deltas in deltaListForChild.items():
             print("Deltas for {}:".format(child.path))
-            print('\n'.join(repr(delta) for delta in deltas))
+            print_deltas(deltas)
             print("")
             
         return deltaListForChild
         
-    # Fix up all deltas so that they have references to their origin VMF.
-    for child, deltas in deltaListForChild.items():
-        for delta in deltas:
-            delta.originVMF = child
-            
     # Merge the delta lists into a single list of deltas, to be applied on top 
     # of the parent.
     progressTracker.update("Merging deltas...")
@@ -210,12 +270,13 @@ def do_merge(
     deltaLists = list(deltaListForChild.values())
     
     try:
-        mergedDeltas = merge_delta_lists(
-            deltaLists,
-            aggressive=aggressive,
-            verbose=verbose,
-        )
-        
+        with gc_paused():
+            mergedDeltas = merge_delta_lists(
+                deltaLists,
+                aggressive=aggressive,
+                verbose=verbose,
+            )
+            
     except DeltaMergeConflict as e:
         print(str(e))
         mergedDeltas = e.partialDeltas
@@ -223,8 +284,9 @@ def do_merge(
         print("")
         print("Conflicted deltas:")
         conflictedDeltas = e.conflictedDeltas
+        write = sys.stdout.write
         for delta in conflictedDeltas:
-            print("From {}:".format(delta.get_origin_filename()), repr(delta))
+            write(f"From {delta.get_origin_filename()}: {delta!r}\n")
             
         print("")
         
@@ -239,7 +301,7 @@ def do_merge(
         if verbose:
             print()
             print("Conflict resolution deltas:")
-            print('\n'.join(repr(delta) for delta in conflictResolutionDeltas))
+            print_deltas(conflictResolutionDeltas)
             print()
         
         mergedDeltas += conflictResolutionDeltas
@@ -249,7 +311,7 @@ def do_merge(
         
     if dumpProposed:
         print("Merged deltas:")
-        print('\n'.join(repr(delta) for delta in mergedDeltas))
+        print_deltas(mergedDeltas)
         return mergedDeltas
         
     # Apply the merged deltas to the parent.
@@ -259,25 +321,33 @@ def do_merge(
     # Write the mutated parent to the target VMF path.
     progressTracker.update("Writing merged VMF...")
     
-    def get_merged_vmf_path(parentPath):
+    def open_merged_vmf_file(parentPath):
         parentDir = os.path.dirname(parentPath)
         parentFileName = os.path.basename(parentPath)
         
         parentName, ext = os.path.splitext(parentFileName)
         
-        mergedFileName = parentName + '_merged' + ext
-        mergedFilePath = os.path.join(parentDir, mergedFileName)
+        mergedPathPrefix = os.path.join(parentDir, parentName + '_merged')
+        mergedFilePath = mergedPathPrefix + ext
         
-        # Make sure the output filename is unique...
+        # Make sure the output filename is unique... Opening in exclusive 
+        # creation mode checks for an existing file and creates the new one 
+        # in a single step, so nothing can claim the name in between.
         i = 0
-        while os.path.exists(mergedFilePath):
-            mergedFileName = parentName + '_merged_' + str(i) + ext
-            mergedFilePath = os.path.join(parentDir, mergedFileName)
-            i += 1
-            
-        return mergedFilePath
+        while True:
+            try:
+                return open(mergedFilePath, 'x')
+            except FileExistsError:
+                mergedFilePath = f"{mergedPathPrefix}_{i}{ext}"
+                i += 1
+                
+    # Format the merged VMF before creating its file, so that a formatting 
+    # error doesn't leave an empty file behind to claim the output name.
+    outData = parent.to_data()
+    
+    with open_merged_vmf_file(parent.path) as f:
+        f.write(outData)
         
-    parent.write_path(get_merged_vmf_path(parent.path))
     # parent.write_path('out.vmf')
     
     # Done!
@@ -322,7 +392,8 @@ def main(argv):
         parent = vmfs[0]
         
     # Determine the child VMFs.
-    children = [vmf for vmf in vmfs if vmf is not parent]
+    children = list(vmfs)
+    children.remove(parent)
     
     # Go!
     do_merge(